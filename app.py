@@ -1,34 +1,203 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context
 import os
 import io
-from PIL import Image
-from werkzeug.utils import secure_filename
-import fitz  # PyMuPDF para extraer texto de PDFs
-import openai
+import time
+import threading
 from dotenv import load_dotenv
-from pptx import Presentation
-from pptx.enum.shapes import MSO_SHAPE_TYPE
-from google.cloud import vision
+from content_filter import INAPPROPRIATE, WordlistFilter, load_lexicon
+from concurrency import create_process_pool, map_bounded, run_in_pool
+from llm import LLMClient, chat_completion, configure_client
+from jobs import JobQueue, JobStore
+from llm_cache import LLMCache
+from metrics import metrics
+from pipeline import run_stages, log_timings
+from prompts import count_tokens, dedupe_lines, fit_presentation, pack_by_budget, parse_json_object, split_into_chunks, truncate_to_budget
+from rubric_store import RubricStore
+from slide_store import SlideStore, slide_fingerprint, slide_fingerprints
+from uploads import UploadRequest, spool_upload
+from vision_analysis import annotate_images
+from extraction import extract_presentation, extract_pdf_table, open_pdf, slides_text, texts_per_slide, slide_titles, slide_subtitles, slide_body_texts, slide_images, iter_image_blobs
 import logging
 
-logging.basicConfig(level=logging.DEBUG)
-
-# Cargar las variables de entorno desde el archivo .env
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-app.config['UPLOAD_FOLDER'] = 'uploads/'
-app.config['ALLOWED_EXTENSIONS'] = {'pdf', 'ppt', 'pptx'}
-app.secret_key = os.urandom(24)  # Genera una clave secreta aleatoria
-
-openai.api_key = os.getenv('OPENAI_API_KEY')  # Clave API de OpenAI desde una variable de entorno
+app.request_class = UploadRequest  # Los archivos se reciben en memoria o en un temporal único, con su SHA-256
+
+# Servicios compartidos; los crea create_app()
+rubric_store = None  # Rúbricas ya procesadas, por huella del archivo
+slide_store = None  # Resultados por diapositiva de entregas anteriores (None si está desactivado)
+job_store = None
+job_queue = None
+parse_pool = None
+moderation_filter = None  # Filtro local previo a la moderación con GPT-4 (None si está desactivado)
+
+# Tokens reservados para las instrucciones fijas de los prompts de evaluación
+PROMPT_TEMPLATE_TOKENS = 300
+# Feedback de una diapositiva cuya verificación falló; no se guarda para reutilizarlo
+SLIDE_CHECK_ERROR = "Error al verificar la consistencia de la diapositiva."
+# Resultado de un fragmento cuya moderación con GPT-4 falló
+INAPPROPRIATE_CHECK_ERROR = "Error al analizar el contenido inapropiado."
+# Módulos que precarga el servidor de procesos del pool de lectura
+PARSE_POOL_PRELOAD = ['extraction', 'vision_analysis', 'pptx', 'fitz', 'pdfplumber', 'PIL.Image']
+# Léxicos del filtro de contenido inapropiado incluidos con la aplicación
+LEXICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lexicon')
+
+def create_app(config=None):
+    """
+    Configura la aplicación a partir de las variables de entorno y crea los servicios compartidos
+    (cliente de OpenAI, almacenes SQLite, cola de trabajos y pool de procesos). Se llama una vez
+    por proceso; importar el módulo no lee archivos ni carga python-pptx, PyMuPDF, OpenAI o Vision,
+    que se importan en el primer uso o en el calentamiento (WARMUP=1).
+    Args:
+        config (dict): Valores que reemplazan a los leídos del entorno.
+    Returns:
+        Flask: La aplicación.
+    """
+    global rubric_store, slide_store, job_store, job_queue, parse_pool, moderation_filter
+
+    # Cargar las variables de entorno desde el archivo .env
+    load_dotenv()
+
+    # Registro por niveles: en producción INFO; LOG_LEVEL=DEBUG muestra cada llamada a las APIs
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+                        format='%(asctime)s %(levelname)s %(name)s [%(threadName)s] %(message)s')
+
+    app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads/')  # Temporales de las subidas grandes; se eliminan al terminar el análisis
+    app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('UPLOAD_MAX_BYTES', 50 * 1024 * 1024))  # Tamaño máximo de una solicitud
+    app.config['UPLOAD_MEMORY_BYTES'] = int(os.getenv('UPLOAD_MEMORY_BYTES', 8 * 1024 * 1024))  # Hasta este tamaño el archivo no toca el disco
+    app.config['ALLOWED_EXTENSIONS'] = {'pdf', 'ppt', 'pptx'}
+    app.config['LLM_MAX_IN_FLIGHT'] = int(os.getenv('LLM_MAX_IN_FLIGHT', 4))  # Llamadas por diapositiva simultáneas a OpenAI
+    app.config['PIPELINE_MAX_WORKERS'] = int(os.getenv('PIPELINE_MAX_WORKERS', 8))  # Etapas del análisis simultáneas
+    app.config['VISION_BATCH_SIZE'] = int(os.getenv('VISION_BATCH_SIZE', 16))  # Imágenes por llamada a Vision (máximo 16)
+    app.config['VISION_MAX_SIDE'] = int(os.getenv('VISION_MAX_SIDE', 1024))  # Lado máximo de las imágenes enviadas a Vision
+    app.config['PROMPT_TOKEN_BUDGET'] = int(os.getenv('PROMPT_TOKEN_BUDGET', 6000))  # Tokens de entrada por prompt de evaluación
+    app.config['PROMPT_CHUNK_TOKENS'] = int(os.getenv('PROMPT_CHUNK_TOKENS', 2000))  # Tokens por fragmento de texto
+    app.config['SLIDE_CHECK_BATCH_SIZE'] = int(os.getenv('SLIDE_CHECK_BATCH_SIZE', 1))  # Diapositivas por prompt de consistencia; 1 = una llamada por diapositiva
+    app.config['EVALUATION_MAX_RETRIES'] = int(os.getenv('EVALUATION_MAX_RETRIES', 2))  # Reintentos para las medidas sin puntaje válido
+    app.config['PARSE_PROCESSES'] = int(os.getenv('PARSE_PROCESSES', 0))  # Procesos para leer archivos y preparar imágenes; 0 = en el hilo de la petición
+    app.config['PDF_PAGES_PER_TASK'] = int(os.getenv('PDF_PAGES_PER_TASK', 25))  # Páginas de PDF por tarea del pool de procesos
+    app.config['WARMUP'] = os.getenv('WARMUP', '0') == '1'  # Importar las bibliotecas pesadas al arrancar, en segundo plano
+
+    # Clave de las sesiones (mensajes flash): la misma en todos los procesos y reinicios
+    app.config['SECRET_KEY_PATH'] = os.getenv('SECRET_KEY_PATH', 'cache/secret_key')
+
+    # Caché de respuestas de OpenAI: LRU en memoria más SQLite en disco
+    app.config['LLM_CACHE_ENABLED'] = os.getenv('LLM_CACHE_ENABLED', '1') == '1'
+    app.config['LLM_CACHE_PATH'] = os.getenv('LLM_CACHE_PATH', 'cache/llm_cache.sqlite3')
+    app.config['LLM_CACHE_TTL'] = int(os.getenv('LLM_CACHE_TTL', 7 * 24 * 3600))  # Segundos
+    app.config['LLM_CACHE_MEMORY_ENTRIES'] = int(os.getenv('LLM_CACHE_MEMORY_ENTRIES', 512))
+    app.config['LLM_CACHE_DISK_ENTRIES'] = int(os.getenv('LLM_CACHE_DISK_ENTRIES', 10000))
+
+    # Cliente compartido de OpenAI: conexiones reutilizadas, cuota por minuto y reintentos con backoff
+    app.config['LLM_MAX_CONNECTIONS'] = int(os.getenv('LLM_MAX_CONNECTIONS', 16))
+    app.config['LLM_REQUESTS_PER_MINUTE'] = int(os.getenv('LLM_REQUESTS_PER_MINUTE', 0)) or None  # 0 = sin límite
+    app.config['LLM_TOKENS_PER_MINUTE'] = int(os.getenv('LLM_TOKENS_PER_MINUTE', 0)) or None  # 0 = sin límite
+    app.config['LLM_MAX_RETRIES'] = int(os.getenv('LLM_MAX_RETRIES', 5))
+    # Procesos del servidor (gunicorn exporta WEB_CONCURRENCY): las cuotas por minuto son de toda la
+    # cuenta de OpenAI, así que cada proceso recibe su parte
+    app.config['WEB_CONCURRENCY'] = int(os.getenv('WEB_CONCURRENCY', 1))
+
+    app.config['RUBRIC_STORE_PATH'] = os.getenv('RUBRIC_STORE_PATH', 'cache/rubrics.sqlite3')
+
+    # Resultados por diapositiva de entregas anteriores: al volver a subir una presentación corregida
+    # solo las imágenes y diapositivas que cambiaron llegan a Vision y a OpenAI
+    app.config['SLIDE_STORE_ENABLED'] = os.getenv('SLIDE_STORE_ENABLED', '1') == '1'
+    app.config['SLIDE_STORE_PATH'] = os.getenv('SLIDE_STORE_PATH', 'cache/slides.sqlite3')
+    app.config['SLIDE_STORE_TTL'] = int(os.getenv('SLIDE_STORE_TTL', 30 * 24 * 3600))  # Segundos
+
+    # Trabajos de análisis en segundo plano (POST /jobs)
+    app.config['JOB_STORE_PATH'] = os.getenv('JOB_STORE_PATH', 'cache/jobs.sqlite3')
+    app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', 2))  # Análisis simultáneos por proceso
+    app.config['JOB_EVENTS_POLL_INTERVAL'] = float(os.getenv('JOB_EVENTS_POLL_INTERVAL', 0.5))  # Segundos entre consultas de /events
+    app.config['JOB_STALE_AFTER'] = float(os.getenv('JOB_STALE_AFTER', 60))  # Segundos sin latido tras los que un trabajo pendiente se marca fallido
+
+    # Filtro local de contenido inapropiado: solo las diapositivas con términos del léxico llegan a GPT-4
+    app.config['MODERATION_PREFILTER'] = os.getenv('MODERATION_PREFILTER', '1') == '1'  # 0 = toda la presentación pasa por GPT-4
+    app.config['MODERATION_LEXICONS'] = os.getenv('MODERATION_LEXICONS', ','.join(os.path.join(LEXICON_DIR, name) for name in ('es.txt', 'en.txt')))  # Archivos separados por comas
+
+    # Carpeta donde cada proceso publica sus métricas para que /metrics muestre la suma de todos; vacío = solo este proceso
+    app.config['METRICS_DIR'] = os.getenv('METRICS_DIR', '')
+
+    app.config.update(config or {})
+    app.secret_key = os.getenv('SECRET_KEY') or load_secret_key(app.config['SECRET_KEY_PATH'])
+
+    # Asegurarse de que la carpeta de subidas exista
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+    configure_client(LLMClient(
+        cache=LLMCache(app.config['LLM_CACHE_PATH'], app.config['LLM_CACHE_TTL'],
+                       app.config['LLM_CACHE_MEMORY_ENTRIES'], app.config['LLM_CACHE_DISK_ENTRIES']) if app.config['LLM_CACHE_ENABLED'] else None,
+        max_connections=app.config['LLM_MAX_CONNECTIONS'],
+        requests_per_minute=share_quota(app.config['LLM_REQUESTS_PER_MINUTE'], app.config['WEB_CONCURRENCY']),
+        tokens_per_minute=share_quota(app.config['LLM_TOKENS_PER_MINUTE'], app.config['WEB_CONCURRENCY']),
+        max_retries=app.config['LLM_MAX_RETRIES'],
+        api_key=os.getenv('OPENAI_API_KEY')  # Clave API de OpenAI desde una variable de entorno
+    ))
+
+    rubric_store = RubricStore(app.config['RUBRIC_STORE_PATH'])
+    slide_store = SlideStore(app.config['SLIDE_STORE_PATH'], app.config['SLIDE_STORE_TTL']) if app.config['SLIDE_STORE_ENABLED'] else None
+    job_store = JobStore(app.config['JOB_STORE_PATH'], stale_after=app.config['JOB_STALE_AFTER'])
+    job_queue = JobQueue(job_store, app.config['JOB_WORKERS'])
+    moderation_filter = WordlistFilter(load_lexicon(app.config['MODERATION_LEXICONS'].split(','))) if app.config['MODERATION_PREFILTER'] else None
+
+    # Lectura de presentaciones y rúbricas y preparación de imágenes fuera del GIL del servidor web;
+    # entre procesos solo viajan bytes y registros simples
+    parse_pool = create_process_pool(app.config['PARSE_PROCESSES'], preload=PARSE_POOL_PRELOAD)
+
+    if app.config['METRICS_DIR']:
+        metrics.share(app.config['METRICS_DIR'])
+
+    if app.config['WARMUP']:
+        threading.Thread(target=warm_up, name='warmup', daemon=True).start()
+    return app
+
+def share_quota(quota, processes):
+    """Parte de una cuota por minuto que le corresponde a cada proceso; None = sin límite."""
+    return max(1, quota // processes) if quota else None
+
+def load_secret_key(path):
+    """
+    Lee la clave secreta guardada en 'path' o la genera si no existe. La creación es atómica:
+    si varios procesos arrancan a la vez, todos terminan usando la primera clave escrita.
+    """
+    if not os.path.exists(path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        # Solo el dueño puede leer la clave; os.link conserva los permisos del temporal
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(os.urandom(32))
+        try:
+            os.link(temp_path, path)  # Falla si otro proceso ya creó la clave
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temp_path)
+    with open(path, 'rb') as f:
+        return f.read()
+
+def warm_up():
+    """Importa las bibliotecas que se cargan en el primer uso y el tokenizador, para que la primera petición no pague su costo."""
+    start = time.perf_counter()
+    import fitz, pdfplumber, pptx, openai  # noqa: F401
+    from PIL import Image  # noqa: F401
+    from google.cloud import vision  # noqa: F401
+    count_tokens("calentamiento")
+    logger.info("Calentamiento completado en %.2f s", time.perf_counter() - start)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
-# Asegurarse de que la carpeta de subidas exista
-if not os.path.exists(app.config['UPLOAD_FOLDER']):
-    os.makedirs(app.config['UPLOAD_FOLDER'])
+@app.errorhandler(413)
+def upload_too_large(e):
+    error = f"El archivo supera el tamaño máximo de {app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)} MB"
+    if request.path == url_for('submit_job'):
+        return jsonify({'error': error}), 413
+    flash(error)
+    return redirect(url_for('upload_file'))
 
 @app.route('/')
 def upload_file():
@@ -37,115 +206,369 @@ def upload_file():
 @app.route('/uploader', methods=['GET', 'POST'])
 def uploader_file():
     if request.method == 'POST':
-        if 'rubric' not in request.files and 'presentation' not in request.files:
-            flash('No se encontró la parte del archivo')
+        submission, error = save_submission()
+        if error:
+            flash(error)
             return redirect(request.url)
 
-        rubric_file = request.files['rubric'] if 'rubric' in request.files else None
-        presentation_file = request.files['presentation']
-        user_type = request.form['user_type']
-        presentation_theme = request.form['presentation_theme']
-        presentation_type = request.form['presentation_type']
-
-        if presentation_file.filename == '':
-            flash('No se seleccionó ningún archivo de presentación')
-            return redirect(request.url)
-
-        if user_type not in ['salesperson', 'developer', 'marketing', 'public_speaker', 'Enseñanza Basica', 'Enseñanza Media', 'Enseñanza universtaria'] and (not rubric_file or rubric_file.filename == ''):
-            flash('No se seleccionó ningún archivo de rúbrica')
+        try:
+            context, error = analyze_submission(**submission)
+        finally:
+            close_submission_files(submission)
+        if error:
+            flash(error)
             return redirect(request.url)
+        return render_template('result.html', **context)
+    else:
+        return render_template('upload.html')
 
-        if presentation_file and allowed_file(presentation_file.filename):
-            presentation_filename = secure_filename(presentation_file.filename)
-            presentation_path = os.path.join(app.config['UPLOAD_FOLDER'], presentation_filename)
-            presentation_file.save(presentation_path)
-
-            presentation_text = extract_text_from_ppt(presentation_path)
-            inappropriate_content = check_for_inappropriate_content(presentation_text)
-
-            titles = extract_titles(presentation_path)
-            subtitles = extract_subtitles(presentation_path)
-            body_texts = extract_body_texts(presentation_path, titles, subtitles)
-            images = extract_images(presentation_path)
-            analyzed_images = [analyze_image_google_cloud(slide_idx, image) for slide_idx, image in images]
-
-            # Obtener la descripción del tema
-            topic_description = get_topic_description(presentation_theme)
-
-            # Inicializar measures y points_type
-            measures = None
-            points_type = None
-
-            if user_type in ['salesperson', 'developer', 'marketing', 'public_speaker']:
-                grade, general_feedback, slide_feedback = evaluate_presentation( measures, points_type, titles, subtitles, body_texts, analyzed_images, user_type, topic_description)
-                return render_template('result.html', presentation_score=grade, specific_feedback=[], general_feedback=general_feedback.split('\n'), inappropriate_content_feedback=inappropriate_content, rubric_table_html=None, user_type=user_type, slide_feedback=slide_feedback)
-            elif user_type in ['Enseñanza Basica', 'Enseñanza Media', 'Enseñanza universtaria']:
-                if rubric_file and allowed_file(rubric_file.filename):
-                    rubric_filename = secure_filename(rubric_file.filename)
-                    rubric_path = os.path.join(app.config['UPLOAD_FOLDER'], rubric_filename)
-                    rubric_file.save(rubric_path)
-
-                    # Extraer tabla del PDF de la rúbrica
-                    rubric_table = extract_rubric_table(rubric_path)
-                    rubric_table_html = table_to_html(rubric_table)
-
-                    rubric_text = extract_text_from_pdf(rubric_path)
-                    is_rubric, _ = check_if_rubric(rubric_text)
-                
-                    if not is_rubric:
-                        flash('El archivo cargado no es una rúbrica válida')
-                        return redirect(request.url)
-
-                    measures = get_measures(rubric_text)
-                    points_type = get_points_type(rubric_text)
-                    max_score = calculate_total_score(measures, points_type)  # Calcular el puntaje máximo
-
-                    grade, specific_feedback, slide_feedback, used_measures = evaluate_presentation( measures, points_type, titles, subtitles, body_texts, analyzed_images, user_type, topic_description)
-                    general_feedback = generate_general_feedback(presentation_theme, presentation_type, titles, subtitles, body_texts, analyzed_images, user_type)
-
-                    total_score = sum([int(feedback.split(":")[1]) for feedback in specific_feedback if ":" in feedback])  # Calcular el puntaje total
-                    grade = convert_score_to_grade(total_score, max_score)  # Convertir el puntaje total en una nota
-
-                    if grade == 7:
-                        general_feedback += "\nFelicidades, has obtenido una nota perfecta. ¡Excelente trabajo!"
-
-                    return render_template('result.html', presentation_score=grade, specific_feedback=specific_feedback, general_feedback=general_feedback.split('\n'), inappropriate_content_feedback=inappropriate_content, rubric_table_html=rubric_table_html, user_type=user_type, slide_feedback=slide_feedback, used_measures=used_measures)
-                else:
-                    flash('No se seleccionó ningún archivo de rúbrica')
-                    return redirect(request.url)
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Encola el análisis y responde de inmediato con el identificador del trabajo."""
+    submission, error = save_submission()
+    if error:
+        return jsonify({'error': error}), 400
+
+    job_id = job_queue.submit(run_submission_job, submission)
+    return jsonify({'job_id': job_id, 'status_url': url_for('job_status', job_id=job_id), 'result_url': url_for('job_result', job_id=job_id),
+                    'events_url': url_for('job_events', job_id=job_id), 'stream_url': url_for('job_stream', job_id=job_id)}), 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'No se encontró el trabajo'}), 404
+    job.pop('result')
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    job = job_store.get(job_id)
+    if job is None:
+        flash('No se encontró el trabajo')
+        return redirect(url_for('upload_file'))
+    if job['status'] == 'failed':
+        flash(job['error'])
+        return redirect(url_for('upload_file'))
+    if job['status'] != 'done':
+        return jsonify({'status': job['status']}), 202
+    return render_template('result.html', **job['result'])
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """
+    Transmite con server-sent events los resultados parciales del trabajo: el feedback de cada
+    diapositiva ('slide'), la moderación ('moderation'), la nota ('grade') y el cierre ('done' o 'failed').
+    """
+    if job_store.get(job_id) is None:
+        return jsonify({'error': 'No se encontró el trabajo'}), 404
+    # Reanudar tras una reconexión; un encabezado inválido reenvía todos los eventos
+    last_event_id = request.headers.get('Last-Event-ID', '').strip()
+    last_seq = int(last_event_id) if last_event_id.isdigit() else 0
+
+    def stream():
+        seq = last_seq
+        last_sent = time.monotonic()
+        while True:
+            for seq, event, data in job_store.events_since(job_id, seq):
+                yield f"id: {seq}\nevent: {event}\ndata: {data}\n\n"
+                last_sent = time.monotonic()
+                if event in ('done', 'failed'):
+                    return
+            if time.monotonic() - last_sent > 15:
+                yield ": keep-alive\n\n"  # Evita que el proxy cierre la conexión inactiva
+                last_sent = time.monotonic()
+                job_store.get(job_id)  # Si el proceso del trabajo murió, esto publica su evento 'failed'
+            time.sleep(app.config['JOB_EVENTS_POLL_INTERVAL'])
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/jobs/<job_id>/stream')
+def job_stream(job_id):
+    """Página que muestra el feedback de cada diapositiva a medida que llega."""
+    if job_store.get(job_id) is None:
+        flash('No se encontró el trabajo')
+        return redirect(url_for('upload_file'))
+    return render_template('stream.html', events_url=url_for('job_events', job_id=job_id), result_url=url_for('job_result', job_id=job_id))
+
+def save_submission():
+    """
+    Valida el formulario de /uploader y guarda los archivos recibidos.
+    Returns:
+        tuple: (argumentos para analyze_submission, mensaje de error o None).
+    """
+    if 'rubric' not in request.files and 'presentation' not in request.files:
+        return None, 'No se encontró la parte del archivo'
+
+    rubric_file = request.files['rubric'] if 'rubric' in request.files else None
+    rubric_id = request.form.get('rubric_id', '').strip()  # Rúbrica registrada previamente
+    presentation_file = request.files['presentation']
+    user_type = request.form['user_type']
+
+    if presentation_file.filename == '':
+        return None, 'No se seleccionó ningún archivo de presentación'
+
+    if user_type not in ['salesperson', 'developer', 'marketing', 'public_speaker', 'Enseñanza Basica', 'Enseñanza Media', 'Enseñanza universtaria'] and not rubric_id and (not rubric_file or rubric_file.filename == ''):
+        return None, 'No se seleccionó ningún archivo de rúbrica'
+
+    if not presentation_file or not allowed_file(presentation_file.filename):
+        return None, 'Archivo no permitido'
+
+    submission = {
+        'user_type': user_type,
+        'presentation_theme': request.form['presentation_theme'],
+        'presentation_type': request.form['presentation_type'],
+        'rubric_id': None,
+        'rubric_upload': None
+    }
+
+    if user_type in ['salesperson', 'developer', 'marketing', 'public_speaker']:
+        pass
+    elif user_type in ['Enseñanza Basica', 'Enseñanza Media', 'Enseñanza universtaria']:
+        if rubric_id:
+            if rubric_store.get(rubric_id) is None:
+                return None, 'No se encontró la rúbrica registrada'
+        elif not rubric_file or not allowed_file(rubric_file.filename):
+            return None, 'No se seleccionó ningún archivo de rúbrica'
+        else:
+            # Una rúbrica ya procesada (misma huella) se reutiliza sin volver a analizarla
+            rubric_upload = spool(rubric_file)
+            rubric_id = rubric_upload.sha256
+            if rubric_store.get(rubric_id) is None:
+                submission['rubric_upload'] = rubric_upload
             else:
-                flash('Tipo de usuario no permitido')
-                return redirect(request.url)
-        
-        flash('Archivo no permitido')
-        return redirect(request.url)
+                rubric_upload.close()
+        submission['rubric_id'] = rubric_id
     else:
-        return render_template('upload.html')
+        return None, 'Tipo de usuario no permitido'
+
+    submission['presentation_upload'] = spool(presentation_file)
+    return submission, None
+
+def spool(file):
+    # Los archivos pequeños quedan en memoria; los grandes, en un temporal único en UPLOAD_FOLDER escrito al recibirlos
+    return spool_upload(file, app.config['UPLOAD_MEMORY_BYTES'], app.config['UPLOAD_FOLDER'])
+
+def close_submission_files(submission):
+    for upload in (submission['presentation_upload'], submission['rubric_upload']):
+        if upload:
+            upload.close()
+
+def run_submission_job(submission, progress):
+    try:
+        context, error = analyze_submission(**submission, progress=progress)
+    finally:
+        close_submission_files(submission)
+    if context:
+        progress.emit('grade', {'presentation_score': context['presentation_score'], 'general_feedback': context['general_feedback']})
+    return context, error
+
+def analyze_submission(presentation_upload, rubric_upload, rubric_id, user_type, presentation_theme, presentation_type, progress=None):
+    """
+    Ejecuta el análisis completo de una presentación.
+    Args:
+        progress (JobProgress): Opcional; recibe la etapa en curso y el avance por diapositiva.
+    Returns:
+        tuple: (variables para result.html, mensaje de error o None).
+    """
+    on_slide_done = progress.slide_finished if progress else None
+
+    # Etapas del análisis; cada una se ejecuta apenas sus entradas están disponibles
+    stages = {
+        # Una sola pasada sobre la presentación; todos los extractores leen de estos registros
+        'slides': (lambda: extract_presentation(presentation_upload.source, presentation_upload.filename, parse_pool, app.config['PDF_PAGES_PER_TASK']), []),
+        'inappropriate_content': (lambda slides: check_for_inappropriate_content(texts_per_slide(slides)), ['slides']),
+        'slide_texts': (extract_slide_texts, ['slides']),
+        'analyzed_images': (analyze_slide_images, ['slides']),
+        # Obtener la descripción del tema
+        'topic_description': (lambda: get_topic_description(presentation_theme), []),
+    }
+
+    if rubric_id is None:
+        stages['evaluation'] = (
+            lambda slides, slide_texts, analyzed_images, topic_description:
+                evaluate_presentation(None, None, *slide_texts, analyzed_images, user_type, topic_description, on_slide_done, slide_fingerprints(slides, presentation_theme)),
+            ['slides', 'slide_texts', 'analyzed_images', 'topic_description'])
+        results = run_analysis_stages(stages, progress)
+
+        grade, general_feedback, slide_feedback = results['evaluation']
+        return dict(presentation_score=grade, specific_feedback=[], general_feedback=general_feedback.split('\n'), inappropriate_content_feedback=results['inappropriate_content'], rubric_table_html=None, user_type=user_type, slide_feedback=slide_feedback), None
+
+    rubric = rubric_store.get(rubric_id)
+    if rubric is not None:
+        stages['rubric'] = (lambda: rubric, [])
+    else:
+        stages.update(rubric_stages(rubric_upload.source, rubric_id))
+
+    stages.update({
+        'evaluation': (
+            lambda rubric, slides, slide_texts, analyzed_images, topic_description:
+                evaluate_presentation(rubric['measures'], rubric['points_type'], *slide_texts, analyzed_images, user_type, topic_description, on_slide_done,
+                                      slide_fingerprints(slides, presentation_theme)) if rubric['is_rubric'] else None,
+            ['rubric', 'slides', 'slide_texts', 'analyzed_images', 'topic_description']),
+        'general_feedback': (
+            lambda rubric, slide_texts, analyzed_images:
+                generate_general_feedback(presentation_theme, presentation_type, *slide_texts, analyzed_images, user_type) if rubric['is_rubric'] else None,
+            ['rubric', 'slide_texts', 'analyzed_images']),
+    })
+    results = run_analysis_stages(stages, progress)
+
+    rubric = results['rubric']
+    if not rubric['is_rubric']:
+        return None, 'El archivo cargado no es una rúbrica válida'
 
-def extract_text_from_pdf(filepath):
-    doc = fitz.open(filepath)
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    print(text)  # Imprimir el texto extraído en la consola
-    return text
+    max_score = rubric['max_score']  # Puntaje máximo calculado al procesar la rúbrica
+
+    grade, specific_feedback, slide_feedback, used_measures = results['evaluation']
+    general_feedback = results['general_feedback']
+
+    total_score = sum(used_measures.values())  # Calcular el puntaje total con los puntajes ya validados
+    grade = convert_score_to_grade(total_score, max_score)  # Convertir el puntaje total en una nota
+
+    if grade == 7:
+        general_feedback += "\nFelicidades, has obtenido una nota perfecta. ¡Excelente trabajo!"
+
+    return dict(presentation_score=grade, specific_feedback=specific_feedback, general_feedback=general_feedback.split('\n'), inappropriate_content_feedback=results['inappropriate_content'], rubric_table_html=rubric['table_html'], user_type=user_type, slide_feedback=slide_feedback, used_measures=used_measures), None
+
+def run_analysis_stages(stages, progress=None, kind='presentacion'):
+    start = time.perf_counter()
+    try:
+        if progress:
+            def on_finish(name, result):
+                progress.stage_finished(name, result)
+                if name == 'inappropriate_content':
+                    progress.emit('moderation', result)
+
+            progress.stages(len(stages))
+            results, timings = run_stages(stages, app.config['PIPELINE_MAX_WORKERS'], progress.stage_started, on_finish)
+        else:
+            results, timings = run_stages(stages, app.config['PIPELINE_MAX_WORKERS'])
+    except Exception:
+        metrics.inc('analysis_total', kind=kind, outcome='error')
+        raise
+    metrics.inc('analysis_total', kind=kind, outcome='ok')
+    metrics.observe('analysis_duration_seconds', time.perf_counter() - start, kind=kind)
+    for name, (stage_start, stage_end) in timings.items():
+        metrics.observe('stage_duration_seconds', stage_end - stage_start, kind=kind, stage=name)
+    log_timings(stages, timings)
+    return results
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Métricas del proceso en formato de texto de Prometheus."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/rubrics', methods=['POST'])
+def register_rubric():
+    """Procesa una rúbrica una sola vez y devuelve su identificador para referenciarla en /uploader."""
+    rubric_file = request.files.get('rubric')
+    if not rubric_file or not allowed_file(rubric_file.filename):
+        return jsonify({'error': 'No se seleccionó ningún archivo de rúbrica'}), 400
+
+    rubric_upload = spool(rubric_file)
+    try:
+        rubric_id = rubric_upload.sha256
+        rubric = rubric_store.get(rubric_id)
+        if rubric is None:
+            rubric = run_analysis_stages(rubric_stages(rubric_upload.source, rubric_id), kind='rubrica')['rubric']
+    finally:
+        rubric_upload.close()
+
+    if not rubric['is_rubric']:
+        return jsonify({'error': 'El archivo cargado no es una rúbrica válida'}), 422
+    return jsonify({'rubric_id': rubric_id, 'measures': rubric['measures'], 'points_type': rubric['points_type'], 'max_score': rubric['max_score']})
+
+@app.route('/rubrics/<rubric_id>')
+def get_rubric(rubric_id):
+    rubric = rubric_store.get(rubric_id)
+    if rubric is None:
+        return jsonify({'error': 'No se encontró la rúbrica registrada'}), 404
+    return jsonify({'rubric_id': rubric_id, 'measures': rubric['measures'], 'points_type': rubric['points_type'], 'max_score': rubric['max_score']})
+
+def rubric_stages(rubric_source, rubric_id):
+    """
+    Etapas para procesar una rúbrica; la etapa 'rubric' reúne el resultado y lo guarda en el almacén.
+    rubric_source es la ruta o los bytes del PDF; la tabla y el texto se extraen del mismo contenido.
+    La verificación, las medidas y el tipo de puntos se consultan en paralelo.
+    """
+    return {
+        # Extraer tabla del PDF de la rúbrica
+        'rubric_table_html': (lambda: table_to_html(extract_rubric_table(rubric_source)), []),
+        'rubric_text': (lambda: extract_text_from_pdf(rubric_source), []),
+        'is_rubric': (lambda rubric_text: check_if_rubric(rubric_text)[0], ['rubric_text']),
+        'measures': (get_measures, ['rubric_text']),
+        'points_type': (get_points_type, ['rubric_text']),
+        'rubric': (lambda is_rubric, measures, points_type, table_html: store_rubric(rubric_id, is_rubric, measures, points_type, table_html),
+                   ['is_rubric', 'measures', 'points_type', 'rubric_table_html']),
+    }
+
+def store_rubric(rubric_id, is_rubric, measures, points_type, table_html):
+    rubric = {
+        'is_rubric': is_rubric,
+        'measures': measures,
+        'points_type': points_type,
+        'max_score': calculate_total_score(measures, points_type),
+        'table_html': table_html
+    }
+    # Solo se guardan rúbricas procesadas por completo; un error de OpenAI no debe quedar almacenado
+    if is_rubric and measures and points_type:
+        rubric_store.put(rubric_id, rubric)
+    return rubric
+
+def extract_text_from_pdf(source):
+    with open_pdf(source) as doc:
+        return "".join(page.get_text() for page in doc)
+
+def extract_slide_texts(slides):
+    titles = slide_titles(slides)
+    subtitles = slide_subtitles(slides)
+    body_texts = slide_body_texts(slides, titles, subtitles)
+    return titles, subtitles, body_texts
 
 def extract_text_from_ppt(filepath):
-    prs = Presentation(filepath)
-    text_runs = []
-    for slide in prs.slides:
-        for shape in slide.shapes:
-            if hasattr(shape, "text"):
-                text_runs.append(shape.text)
-    return "\n".join(text_runs)
-
-def check_for_inappropriate_content(text):
+    return slides_text(extract_presentation(filepath))
+
+def check_for_inappropriate_content(texts):
+    """
+    Revisa el texto de la presentación, una entrada por diapositiva. El filtro local recorre todas
+    las diapositivas y solo las que contienen términos del léxico (inadecuados o ambiguos) se
+    envían a GPT-4; una presentación sin coincidencias no hace ninguna llamada.
+    """
+    flagged_terms = {}
+    if moderation_filter is not None:
+        flagged_texts = []
+        for text in texts:
+            found = moderation_filter.find(text)
+            if found:
+                flagged_texts.append(text)
+                flagged_terms.update(found)
+        metrics.inc('moderation_prefilter_total', result='escalada' if flagged_texts else 'limpia')
+        if not flagged_texts:
+            return []
+        texts = flagged_texts
+
+    # Se revisa el texto en fragmentos dentro del presupuesto, analizados en paralelo
+    chunks = split_into_chunks(dedupe_lines("\n".join(texts)), app.config['PROMPT_CHUNK_TOKENS'])
+    detected_issues = []
+    for issues in map_bounded(check_chunk_for_inappropriate_content, chunks, app.config['LLM_MAX_IN_FLIGHT']):
+        for issue in issues:
+            if issue not in detected_issues:
+                detected_issues.append(issue)
+
+    # Si GPT-4 no respondió, se informan al menos los términos claramente inadecuados
+    inappropriate_terms = [term for term, level in flagged_terms.items() if level == INAPPROPRIATE]
+    if inappropriate_terms and INAPPROPRIATE_CHECK_ERROR in detected_issues:
+        detected_issues.append(f"Palabras inadecuadas detectadas: {', '.join(inappropriate_terms)}")
+    return detected_issues
+
+def check_chunk_for_inappropriate_content(text):
     try:
-        response = openai.ChatCompletion.create(
+        response = chat_completion(
             model="gpt-4",
+            purpose="moderacion",
             messages=[
                 {"role": "system", "content": "You are a content analysis tool. Your job is to detect any false information or inappropriate words in the provided text and suggest better alternatives if needed."},
-                {"role": "user", "content": f"Analiza el siguiente texto y detecta cualquier información falsa o palabras inadecuadas. Proporciona las palabras detectadas y sus mejores alternativas:\n\n{text[:3000]}"}
+                {"role": "user", "content": f"Analiza el siguiente texto y detecta cualquier información falsa o palabras inadecuadas. Proporciona las palabras detectadas y sus mejores alternativas:\n\n{text}"}
             ]
         )
         analysis_result = response['choices'][0]['message']['content']
@@ -154,56 +577,73 @@ def check_for_inappropriate_content(text):
             detected_issues.append(analysis_result)
         return detected_issues
     except Exception as e:
-        print(f"Error al analizar el contenido inapropiado: {e}")
-        return ["Error al analizar el contenido inapropiado."]
+        logger.warning("Error al analizar el contenido inapropiado: %s", e)
+        return [INAPPROPRIATE_CHECK_ERROR]
 
 def check_if_rubric(text):
     try:
-        response = openai.ChatCompletion.create(
+        response = chat_completion(
             model="gpt-4",
+            purpose="verificar_rubrica",
             messages=[
                 {"role": "system", "content": "You are a file analysis tool. Your job is to determine whether the provided text is a rubric used for evaluation or not."},
-                {"role": "user", "content": f"Evalua si este texto está relacionado o no a una rúbrica: {text[:3000]}"}
+                {"role": "user", "content": f"Evalua si este texto está relacionado o no a una rúbrica: {truncate_to_budget(dedupe_lines(text), app.config['PROMPT_CHUNK_TOKENS'])}"}
             ]
         )
         is_rubric = "Sí" in response['choices'][0]['message']['content'] or "yes" in response['choices'][0]['message']['content'].lower()
         return is_rubric, None  # Retornar None como segundo valor
     except Exception as e:
-        print(f"Error al evaluar la rúbrica: {e}")
+        logger.warning("Error al evaluar la rúbrica: %s", e)
         return False, None  # Asegurarse de retornar dos valores
 
 def get_measures(text):
+    # Una rúbrica larga se divide en fragmentos; las medidas de cada uno se unen sin repetir
+    chunks = split_into_chunks(dedupe_lines(text), app.config['PROMPT_CHUNK_TOKENS'])
+    measures_list = []
+    for measures in map_bounded(get_chunk_measures, chunks, app.config['LLM_MAX_IN_FLIGHT']):
+        for measure in measures:
+            if measure not in measures_list:
+                measures_list.append(measure)
+    return measures_list
+
+def get_chunk_measures(text):
     try:
-        response = openai.ChatCompletion.create(
+        response = chat_completion(
             model="gpt-4",
+            purpose="medidas",
             messages=[
                 {"role": "system", "content": "You are a file analysis tool. Your job is to extract the rubric statements from the provided text. Each statement describes an aspect of the presentation that is being evaluated."},
-                {"role": "user", "content": f"Extrae los enunciados de la rúbrica del siguiente texto. Solo proporciona los títulos de las categorías evaluadas, sin frase introductoria, sin frase de conclusión, sin descripción, ni valores numéricos, ni caracteres especiales. Proporciona cada título en una nueva línea: {text[:3000]}"}
+                {"role": "user", "content": f"Extrae los enunciados de la rúbrica del siguiente texto. Solo proporciona los títulos de las categorías evaluadas, sin frase introductoria, sin frase de conclusión, sin descripción, ni valores numéricos, ni caracteres especiales. Proporciona cada título en una nueva línea: {text}"}
             ]
         )
         measures = response['choices'][0]['message']['content']
         measures_list = [measure.strip() for measure in measures.split('\n') if measure.strip()]
         return measures_list
     except Exception as e:
-        print(f"Error al extraer las medidas: {e}")
+        logger.warning("Error al extraer las medidas: %s", e)
         return []
 
 def get_points_type(text):
     try:
-        response = openai.ChatCompletion.create(
+        response = chat_completion(
             model="gpt-4",
+            purpose="tipo_puntos",
+            validate=lambda response: parse_points_type(response['choices'][0]['message']['content']),
             messages=[
                 {"role": "system", "content": "You are a file analysis tool. Determine the type of points used in the provided rubric text and list them in descending order."},
-                {"role": "user", "content": f"Extrae el tipo de puntos que se están utilizando en esta rúbrica. No me des texto introductorio, ni de conclusión, ni tampoco descripción. Solo proporciona los valores numéricos en orden descendente: {text[:3000]}"}
+                {"role": "user", "content": f"Extrae el tipo de puntos que se están utilizando en esta rúbrica. No me des texto introductorio, ni de conclusión, ni tampoco descripción. Solo proporciona los valores numéricos en orden descendente: {truncate_to_budget(dedupe_lines(text), app.config['PROMPT_CHUNK_TOKENS'])}"}
             ]
         )
-        points_content = response['choices'][0]['message']['content'].strip()
-        points_list = [int(point.strip()) for point in points_content.split(',')]
-        return sorted(points_list, reverse=True)
+        return parse_points_type(response['choices'][0]['message']['content'])
     except Exception as e:
-        print(f"Error al determinar el tipo de puntos: {e}")
+        logger.warning("Error al determinar el tipo de puntos: %s", e)
         return []
 
+def parse_points_type(content):
+    """Puntajes de la respuesta del modelo, de mayor a menor; ValueError si no son números separados por comas."""
+    points_list = [int(point.strip()) for point in content.strip().split(',')]
+    return sorted(points_list, reverse=True)
+
 def calculate_total_score(measures, points_type):
     if not measures or not points_type:
         return 0
@@ -212,81 +652,33 @@ def calculate_total_score(measures, points_type):
     return total_score
 
 def extract_titles(filepath):
-    prs = Presentation(filepath)
-    titles = []
-    for slide in prs.slides:
-        for shape in slide.shapes:
-            if shape.has_text_frame:
-                title = shape.text_frame.text
-                if title:
-                    titles.append(title)
-                    break
-    return titles
+    return slide_titles(extract_presentation(filepath))
 
 def extract_subtitles(filepath):
-    prs = Presentation(filepath)
-    subtitles = []
-    for slide in prs.slides:
-        subtitle_found = False
-        for shape in slide.shapes:
-            if shape.has_text_frame and not subtitle_found:
-                paragraphs = shape.text_frame.paragraphs
-                if len(paragraphs) > 1:
-                    subtitles.append(paragraphs[1].text)
-                    subtitle_found = True
-        if not subtitle_found:
-            subtitles.append("")
-    return subtitles
+    return slide_subtitles(extract_presentation(filepath))
 
 def extract_body_texts(filepath, titles, subtitles):
-    prs = Presentation(filepath)
-    body_texts = []
-    for slide_idx, slide in enumerate(prs.slides):
-        body_text = []
-        for shape in slide.shapes:
-            if not shape.has_text_frame:
-                continue
-            for paragraph in shape.text_frame.paragraphs:
-                for run in paragraph.runs:
-                    font_size = run.font.size
-                    text = run.text.strip()
-                    if font_size and font_size < 2400000 and text not in titles and text not in subtitles:
-                        body_text.append(text)
-        body_texts.append('\n'.join(body_text))
-    return body_texts
+    return slide_body_texts(extract_presentation(filepath), titles, subtitles)
 
 def extract_images(filepath):
-    prs = Presentation(filepath)
-    images = []
-
-    for slide_idx, slide in enumerate(prs.slides, start=1):
-        for shape in slide.shapes:
-            if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
-                image = shape.image
-                image_bytes = io.BytesIO(image.blob)
-                pil_image = Image.open(image_bytes)
-                images.append((slide_idx, pil_image))  # Incluir el número de diapositiva y la imagen
-
-    return images
+    return slide_images(extract_presentation(filepath))
 
 def analyze_image_google_cloud(slide_idx, image):
-    client = vision.ImageAnnotatorClient()
     img_byte_arr = io.BytesIO()
     image.save(img_byte_arr, format='PNG')
-    content = img_byte_arr.getvalue()
 
-    image = vision.Image(content=content)
-    response = client.label_detection(image=image)
-    labels = response.label_annotations
-
-    analyzed_image_info = ', '.join([label.description for label in labels])
-    print(f"Slide {slide_idx}: {analyzed_image_info}")  # Incluir el número de diapositiva en la impresión
+    _, analyzed_image_info = annotate_images([(slide_idx, img_byte_arr.getvalue())], max_side=app.config['VISION_MAX_SIDE'], store=slide_store)[0]
+    logger.debug("Diapositiva %s: %s", slide_idx, analyzed_image_info)
     
     return slide_idx, analyzed_image_info  # Devolver el número de diapositiva junto con la información analizada
 
-def evaluate_presentation( measures, points_type, titles, subtitles, body_texts, analyzed_images, user_type, topic_description):
+def analyze_slide_images(slides):
+    """Analiza con Vision las imágenes de la presentación; las imágenes repetidas se anotan una sola vez."""
+    return annotate_images(iter_image_blobs(slides), app.config['VISION_BATCH_SIZE'], app.config['VISION_MAX_SIDE'], store=slide_store, executor=parse_pool)
+
+def evaluate_presentation( measures, points_type, titles, subtitles, body_texts, analyzed_images, user_type, topic_description, on_slide_done=None, slide_keys=None):
     try:
-        slide_feedback = check_slide_consistency(titles, subtitles, body_texts, analyzed_images, topic_description)
+        slide_feedback = check_slide_consistency(titles, subtitles, body_texts, analyzed_images, topic_description, on_slide_done=on_slide_done, slide_keys=slide_keys)
         total_score = 0
         max_score = calculate_total_score(measures, points_type)
         used_measures = {measure: 0 for measure in measures}  # Para marcar los ítems utilizados
@@ -304,22 +696,17 @@ def evaluate_presentation( measures, points_type, titles, subtitles, body_texts,
 
         measures_str = "\n".join(measures)
         points_str = ", ".join(map(str, points_type))
+
+        # Ajustar el contenido de la presentación al presupuesto de tokens del prompt
+        content_budget = app.config['PROMPT_TOKEN_BUDGET'] - count_tokens(measures_str) - count_tokens(points_str) - PROMPT_TEMPLATE_TOKENS
+        titles, subtitles, body_texts, analyzed_images = fit_presentation(titles, subtitles, body_texts, analyzed_images, content_budget)
+
         titles_str = "\n".join(titles)
         subtitles_str = "\n".join(subtitles)
         body_texts_str = "\n".join(body_texts)
         images_info_str = "\n".join([f"Slide {idx}: {info}" for idx, info in analyzed_images])
 
-        prompt = f"""
-        Evalúa la siguiente presentación basada en las medidas y tipos de puntos proporcionados. Proporciona un puntaje para cada medida y un feedback específico:
-
-        Tipo de usuario: {user_type}
-
-        Medidas:
-        {measures_str}
-
-        Tipos de puntos:
-        {points_str}
-
+        presentation_str = f"""
         Títulos:
         {titles_str}
 
@@ -333,44 +720,105 @@ def evaluate_presentation( measures, points_type, titles, subtitles, body_texts,
         {images_info_str}
         """
 
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an evaluation tool. Your job is to evaluate the provided presentation text based on the given rubric measures and point types for the specified user type, and provide scores for each measure and specific feedback."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-
-        response_content = response['choices'][0]['message']['content'].strip()
-        lines = response_content.split("\n")
+        # Solo se vuelven a pedir las medidas que faltaron o que vinieron con un puntaje inválido
         scores = {}
-        feedback_lines = []
-        for line in lines:
-            if ":" in line:
-                measure, score = line.split(":")
-                measure = measure.strip()
-                try:
-                    score = int(score.strip().split("/")[0])
-                    scores[measure] = score
-                    used_measures[measure] = score  # Marcar el ítem utilizado
-                    feedback_lines.append(f"{measure}: {score}")
-                except ValueError:
-                    scores[measure] = 0
-                    feedback_lines.append(f"{measure}: 0")
-            else:
-                feedback_lines.append(line)
-
-        feedback_list = [item.strip() for item in feedback_lines if item.strip()]
-        total_score += sum(scores.values())
+        pending = list(measures)
+        # Los reintentos llegan al modelo: score_measures no guarda en la caché una respuesta que deja medidas pendientes
+        for _ in range(app.config['EVALUATION_MAX_RETRIES'] + 1):
+            if not pending:
+                break
+            scores.update(score_measures(pending, points_type, presentation_str, user_type))
+            pending = [measure for measure in pending if measure not in scores]
+
+        feedback_list = []
+        for measure in measures:
+            score, feedback = scores.get(measure, (0, "No se pudo evaluar esta medida."))
+            used_measures[measure] = score  # Marcar el ítem utilizado
+            feedback_list.append(f"{measure}: {score}")
+            if feedback:
+                feedback_list.append(feedback)
+        total_score += sum(used_measures.values())
 
         grade = convert_score_to_grade(total_score, max_score)  # Calcular la nota final
 
         return grade, feedback_list, slide_feedback, used_measures
     except Exception as e:
-        print(f"Error al evaluar la presentación: {e}")
+        logger.warning("Error al evaluar la presentación: %s", e)
         return 0, ["Error en la evaluación de la presentación."], [], {}
 
+def score_measures(measures, points_type, presentation_str, user_type):
+    """
+    Pide al modelo el puntaje y el feedback de cada medida como JSON y valida la respuesta.
+    Returns:
+        dict: Medida -> (puntaje, feedback), solo para las medidas con una respuesta válida.
+    """
+    measures_str = "\n".join(measures)
+    points_str = ", ".join(map(str, points_type))
+    prompt = f"""
+        Evalúa la siguiente presentación basada en las medidas y tipos de puntos proporcionados. Proporciona un puntaje para cada medida y un feedback específico.
+
+        Responde solo con un objeto JSON de la forma {{"scores": [{{"measure": "...", "score": 0, "feedback": "..."}}]}}, con una entrada por medida. "measure" debe ser el texto exacto de la medida y "score" uno de los tipos de puntos.
+
+        Tipo de usuario: {user_type}
+
+        Medidas:
+        {measures_str}
+
+        Tipos de puntos:
+        {points_str}
+        {presentation_str}
+        """
+
+    try:
+        response = chat_completion(
+            model="gpt-4",
+            purpose="puntajes",
+            # Una respuesta que no puntúa todas las medidas no se guarda: el reintento debe llegar al modelo
+            validate=lambda response: len(parse_scores(response, measures, points_type)) == len(measures),
+            messages=[
+                {"role": "system", "content": "You are an evaluation tool. Your job is to evaluate the provided presentation text based on the given rubric measures and point types for the specified user type, and provide scores for each measure and specific feedback. Answer only with the requested JSON object."},
+                {"role": "user", "content": prompt}
+            ]
+        )
+    except Exception as e:
+        logger.warning("Error al evaluar las medidas: %s", e)
+        return {}
+    return parse_scores(response, measures, points_type)
+
+def parse_scores(response, measures, points_type):
+    parsed = parse_json_object(response['choices'][0]['message']['content']) or {}
+    return validate_scores(parsed.get('scores'), measures, points_type)
+
+def validate_scores(items, measures, points_type):
+    """
+    Valida los puntajes del modelo contra la rúbrica: la medida debe existir y el puntaje debe
+    ser uno de los tipos de puntos. Las entradas inválidas se descartan.
+    Returns:
+        dict: Medida -> (puntaje, feedback).
+    """
+    if not isinstance(items, list):
+        return {}
+    by_name = {measure.strip().casefold(): measure for measure in measures}
+    scores = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        measure = by_name.get(str(item.get('measure', '')).strip().casefold())
+        score = item.get('score')
+        if isinstance(score, str) and score.strip().isdigit():
+            score = int(score.strip())
+        if measure is None or isinstance(score, bool) or not isinstance(score, int):
+            continue
+        if points_type and score not in points_type:
+            continue
+        feedback = item.get('feedback') or ''
+        scores[measure] = (score, str(feedback).strip())
+    return scores
+
 def generate_general_feedback(theme, p_type, titles, subtitles, body_texts, images_info, user_type):
+    content_budget = app.config['PROMPT_TOKEN_BUDGET'] - count_tokens(theme) - PROMPT_TEMPLATE_TOKENS
+    titles, subtitles, body_texts, images_info = fit_presentation(titles, subtitles, body_texts, images_info, content_budget)
+
     prompt = f"""
     Tema de la presentación: {theme}
     Tipo de presentación: {p_type}
@@ -384,8 +832,9 @@ def generate_general_feedback(theme, p_type, titles, subtitles, body_texts, imag
     Basado en la información anterior, proporciona recomendaciones generales para mejorar la presentación y asegurar que sea excelente. Asegurate que el la informacion a comunicar sea acorde para {user_type}
     """
 
-    response = openai.ChatCompletion.create(
+    response = chat_completion(
         model="gpt-4",
+        purpose="feedback_general",
         messages=[
             {"role": "system", "content": "You are an evaluation assistant. Your job is to provide general feedback to improve the presentation based on the provided details and the specified user type."},
             {"role": "user", "content": prompt}
@@ -415,30 +864,19 @@ def convert_score_to_grade(total_score, max_score):
     else:
         return 1
 
-import pdfplumber
-
-def extract_rubric_table(pdf_path):
+def extract_rubric_table(source):
     """
     Extrae una tabla de rúbrica de un archivo PDF, incluyendo tablas que se extienden a lo largo de varias páginas.
     Args:
-        pdf_path (str): La ruta al archivo PDF.
+        source (str | bytes): La ruta o el contenido del archivo PDF.
     Returns:
         list: Lista de listas que representa la tabla extraída del PDF.
     """
-    table = []
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                extracted_table = page.extract_table()
-                if extracted_table:
-                    if not table:
-                        table.extend(extracted_table)  # Añadir la primera tabla completa
-                    else:
-                        table.extend(extracted_table[1:])  # Añadir la tabla sin el encabezado
+        return run_in_pool(parse_pool, extract_pdf_table, source)
     except Exception as e:
-        print(f"Error al extraer la tabla del PDF: {e}")
-    
-    return table
+        logger.warning("Error al extraer la tabla del PDF: %s", e)
+        return []
 
 def table_to_html(table):
     """
@@ -472,9 +910,10 @@ def table_to_html(table):
     html_table += '</table>'
     return html_table
 
-def generate_slide_feedback(titles, subtitles, body_texts, analyzed_images, user_type):
-    slide_feedback = []
-    for slide_idx, (title, subtitle, body_text, analyzed_image) in enumerate(zip(titles, subtitles, body_texts, analyzed_images)):
+def generate_slide_feedback(titles, subtitles, body_texts, analyzed_images, user_type, max_in_flight=None):
+    def feedback_for_slide(args):
+        slide_idx, (title, subtitle, body_text, analyzed_image) = args
+        body_text = truncate_to_budget(body_text, app.config['PROMPT_CHUNK_TOKENS'])
         prompt = f"""
         Proporciona recomendaciones específicas para mejorar la siguiente diapositiva. Asegúrate de que la información proporcionada sea apropiada para {user_type}:
 
@@ -484,25 +923,114 @@ def generate_slide_feedback(titles, subtitles, body_texts, analyzed_images, user
         Información de las imágenes: {analyzed_image[1]}
         """
 
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an evaluation assistant. Your job is to provide specific recommendations to improve the slide based on the provided details and the specified user type."},
-                {"role": "user", "content": prompt}
-            ]
+        try:
+            response = chat_completion(
+                model="gpt-4",
+                purpose="feedback_diapositiva",
+                messages=[
+                    {"role": "system", "content": "You are an evaluation assistant. Your job is to provide specific recommendations to improve the slide based on the provided details and the specified user type."},
+                    {"role": "user", "content": prompt}
+                ]
+            )
+            feedback = response['choices'][0]['message']['content'].strip()
+            return {
+                "slide": slide_idx + 1,
+                "feedback": feedback.split('\n')
+            }
+        except Exception as e:
+            logger.warning("Error al generar el feedback de la diapositiva: %s", e)
+            return {
+                "slide": slide_idx + 1,
+                "feedback": ["Error al generar el feedback de la diapositiva."]
+            }
+
+    slides = enumerate(zip(titles, subtitles, body_texts, analyzed_images))
+    return map_bounded(feedback_for_slide, slides, max_in_flight or app.config['LLM_MAX_IN_FLIGHT'])
+
+def check_slide_consistency(titles, subtitles, body_texts, analyzed_images, topic_description, max_in_flight=None, on_slide_done=None, batch_size=None, slide_keys=None):
+    """
+    slide_keys (de slide_fingerprints) identifica el contenido de cada diapositiva; sin ellas no se
+    reutiliza ni se guarda feedback de entregas anteriores.
+    """
+    slides = list(enumerate(zip(titles, subtitles, body_texts, analyzed_images)))
+    batch_size = batch_size or app.config['SLIDE_CHECK_BATCH_SIZE']
+    store = slide_store if slide_keys is not None else None
+
+    def fingerprint(args):
+        # Solo entradas del usuario: la descripción del tema y las etiquetas de Vision son generadas y
+        # pueden cambiar aunque la diapositiva no cambie. La primera diapositiva usa otro prompt.
+        slide_idx, (title, subtitle, body_text, _) = args
+        return slide_fingerprint(slide_idx == 0, title, subtitle, body_text, slide_keys[slide_idx] if slide_idx < len(slide_keys) else None)
+
+    def remember(args, feedback):
+        if store is not None and feedback["feedback"] != [SLIDE_CHECK_ERROR]:
+            store.put('consistency', fingerprint(args), feedback["feedback"])
+
+    def check_slide(args):
+        feedback = check_one_slide(args)
+        remember(args, feedback)
+        if on_slide_done:
+            on_slide_done(feedback, len(slides))  # Avance por diapositiva para el estado del trabajo
+        return feedback
+
+    def check_batch(batch):
+        feedback_by_slide = check_slide_batch(batch)
+        slide_feedback = []
+        for args in batch:
+            slide_idx = args[0]
+            if slide_idx + 1 in feedback_by_slide:
+                feedback = {"slide": slide_idx + 1, "feedback": feedback_by_slide[slide_idx + 1]}
+                remember(args, feedback)
+                if on_slide_done:
+                    on_slide_done(feedback, len(slides))
+            else:
+                feedback = check_slide(args)  # La diapositiva que faltó en la respuesta se revisa sola
+            slide_feedback.append(feedback)
+        return slide_feedback
+
+    def check_slide_batch(batch):
+        slides_block = "\n\n".join(
+            f"Diapositiva {slide_idx + 1}:\nTítulo: {title}\nSubtítulo: {subtitle}\nTexto del cuerpo: {truncate_to_budget(body_text, app.config['PROMPT_CHUNK_TOKENS'])}\nInformación de las imágenes: {analyzed_image[1]}"
+            for slide_idx, (title, subtitle, body_text, analyzed_image) in batch
         )
+        prompt = f"""
+        Verifica si el contenido de cada una de las siguientes diapositivas es coherente con el tema descrito. Proporciona sugerencias específicas para el título, subtítulo y contenido si no está claramente relacionado con el tema. Para la diapositiva 1, verifica además si es una introducción clara del tema y quiénes son los presentadores.
 
-        feedback = response['choices'][0]['message']['content'].strip()
-        slide_feedback.append({
-            "slide": slide_idx + 1,
-            "feedback": feedback.split('\n')
-        })
+        Responde solo con un objeto JSON cuyas llaves sean los números de diapositiva y cuyos valores sean listas con las líneas de feedback de esa diapositiva.
 
-    return slide_feedback
+        Descripción del tema: {topic_description}
+
+        {slides_block}
+        """
 
-def check_slide_consistency(titles, subtitles, body_texts, analyzed_images, topic_description):
-    slide_feedback = []
-    for slide_idx, (title, subtitle, body_text, analyzed_image) in enumerate(zip(titles, subtitles, body_texts, analyzed_images)):
+        try:
+            response = chat_completion(
+                model="gpt-4",
+                purpose="consistencia_lote",
+                validate=lambda response: {slide_idx + 1 for slide_idx, _ in batch} <= parse_batch_feedback(response).keys(),
+                messages=[
+                    {"role": "system", "content": "You are an evaluation assistant. Your job is to verify the consistency of each slide's content with the provided topic description and provide specific suggestions for improvement. Answer only with a JSON object keyed by slide number."},
+                    {"role": "user", "content": prompt}
+                ]
+            )
+        except Exception as e:
+            logger.warning("Error al verificar la consistencia de las diapositivas: %s", e)
+            return {}
+        return parse_batch_feedback(response)
+
+    def parse_batch_feedback(response):
+        parsed = parse_json_object(response['choices'][0]['message']['content']) or {}
+        feedback_by_slide = {}
+        for key, feedback in parsed.items():
+            if isinstance(feedback, str):
+                feedback = feedback.strip().split('\n')
+            if str(key).strip().isdigit() and isinstance(feedback, list):
+                feedback_by_slide[int(key)] = [str(line) for line in feedback]
+        return feedback_by_slide
+
+    def check_one_slide(args):
+        slide_idx, (title, subtitle, body_text, analyzed_image) = args
+        body_text = truncate_to_budget(body_text, app.config['PROMPT_CHUNK_TOKENS'])
         if slide_idx == 0:
             prompt = f"""
             Verifica si la siguiente diapositiva es una introducción clara del tema y quiénes son los presentadores. Proporciona feedback específico sobre cualquier inconsistencia y cómo mejorarla.
@@ -527,31 +1055,56 @@ def check_slide_consistency(titles, subtitles, body_texts, analyzed_images, topi
             """
 
         try:
-            response = openai.ChatCompletion.create(
+            response = chat_completion(
                 model="gpt-4",
+                purpose="consistencia",
                 messages=[
                     {"role": "system", "content": "You are an evaluation assistant. Your job is to verify the consistency of the slide content with the provided topic description and provide specific suggestions for improvement."},
                     {"role": "user", "content": prompt}
                 ]
             )
             feedback = response['choices'][0]['message']['content'].strip()
-            slide_feedback.append({
+            return {
                 "slide": slide_idx + 1,
                 "feedback": feedback.split('\n')
-            })
+            }
         except Exception as e:
-            print(f"Error al verificar la consistencia de la diapositiva: {e}")
-            slide_feedback.append({
+            logger.warning("Error al verificar la consistencia de la diapositiva: %s", e)
+            return {
                 "slide": slide_idx + 1,
-                "feedback": ["Error al verificar la consistencia de la diapositiva."]
-            })
+                "feedback": [SLIDE_CHECK_ERROR]
+            }
+
+    # Las diapositivas sin cambios desde una entrega anterior reutilizan su feedback
+    slide_feedback = {}
+    pending = []
+    for args in slides:
+        known = store.get('consistency', fingerprint(args)) if store is not None else None
+        if known is None:
+            pending.append(args)
+            continue
+        slide_feedback[args[0]] = {"slide": args[0] + 1, "feedback": known}
+        if on_slide_done:
+            on_slide_done(slide_feedback[args[0]], len(slides))
+
+    if batch_size > 1:
+        # Varias diapositivas por prompt: el tema y las instrucciones se envían una vez por lote
+        costs = [count_tokens(f"{title}{subtitle}{body_text}{analyzed_image[1]}") + 30 for _, (title, subtitle, body_text, analyzed_image) in pending]
+        batches = pack_by_budget(pending, costs, batch_size, app.config['PROMPT_TOKEN_BUDGET'] - count_tokens(topic_description) - PROMPT_TEMPLATE_TOKENS)
+        checked = [feedback for batch in map_bounded(check_batch, batches, max_in_flight or app.config['LLM_MAX_IN_FLIGHT']) for feedback in batch]
+    else:
+        # Las llamadas por diapositiva se hacen en paralelo; los resultados vuelven en orden de diapositiva
+        checked = map_bounded(check_slide, pending, max_in_flight or app.config['LLM_MAX_IN_FLIGHT'])
 
-    return slide_feedback
+    for args, feedback in zip(pending, checked):
+        slide_feedback[args[0]] = feedback
+    return [slide_feedback[slide_idx] for slide_idx, _ in slides]
 
 def get_topic_description(topic):
     try:
-        response = openai.ChatCompletion.create(
+        response = chat_completion(
             model="gpt-4",
+            purpose="descripcion_tema",
             messages=[
                 {"role": "system", "content": "You are a knowledgeable assistant."},
                 {"role": "user", "content": f"Proporciona una breve descripción del tema: {topic}"}
@@ -560,8 +1113,8 @@ def get_topic_description(topic):
         topic_description = response['choices'][0]['message']['content'].strip()
         return topic_description
     except Exception as e:
-        print(f"Error al obtener la descripción del tema: {e}")
+        logger.warning("Error al obtener la descripción del tema: %s", e)
         return ""
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
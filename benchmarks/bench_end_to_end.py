@@ -0,0 +1,123 @@
+"""
+Benchmark de punta a punta sin credenciales: sube presentaciones y rúbricas sintéticas a
+/uploader con el cliente de pruebas de Flask, con OpenAI y Vision reemplazados por clientes
+falsos deterministas con latencia configurable.
+
+Cada escenario corre en un proceso aparte (cachés vacías, carpetas temporales) y reporta
+rendimiento (solicitudes por segundo), latencia p50/p95 y pico de memoria (RSS).
+
+Uso: python benchmarks/bench_end_to_end.py --slides 10 40 --measures 5 --requests 8 --concurrency 1 4
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..'))
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def worker(scenario):
+    # Se importa aquí: la aplicación lee su configuración de las variables de entorno del proceso
+    import app
+    app.create_app()
+    from fake_openai import fake_openai, pipeline_responder
+    from fake_vision import fake_vision
+    from synthetic import make_deck, make_rubric_pdf
+
+    deck = make_deck(scenario['slides'], images_per_slide=scenario['images_per_slide'], photos=scenario['photos'])
+    rubric = make_rubric_pdf(scenario['measures'])
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def upload(request_idx):
+        client = app.app.test_client()
+        start = time.perf_counter()
+        response = client.post('/uploader', data={
+            'user_type': 'Enseñanza Media',
+            'presentation_theme': f'El ciclo del agua, grupo {request_idx + 1}',  # Distintos prompts por subida
+            'presentation_type': 'Exposición',
+            'presentation': (io.BytesIO(deck), 'presentacion.pptx'),
+            'rubric': (io.BytesIO(rubric), 'rubrica.pdf'),
+        }, content_type='multipart/form-data')
+        elapsed = time.perf_counter() - start
+        if response.status_code != 200 or 'Puntaje de la presentación' not in response.get_data(as_text=True):
+            raise RuntimeError(f"Respuesta inesperada de /uploader: {response.status_code}")
+        return elapsed
+
+    with fake_vision(latency=scenario['vision_latency']) as vision, \
+            fake_openai(latency=scenario['latency'], responder=pipeline_responder) as openai:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=scenario['concurrency']) as executor:
+            latencies = list(executor.map(upload, range(scenario['requests'])))
+        wall = time.perf_counter() - start
+
+    print(json.dumps({
+        'throughput': len(latencies) / wall,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - baseline_rss,
+        'openai_calls': openai.calls,
+        'vision_calls': vision.calls,
+    }))
+
+def run_scenario(scenario):
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ)
+        env.update({
+            'LLM_CACHE_ENABLED': '0',  # Cada solicitud debe llegar a los clientes falsos
+            'SLIDE_STORE_ENABLED': '0',
+            'RUBRIC_STORE_PATH': os.path.join(directory, 'rubrics.sqlite3'),
+            'JOB_STORE_PATH': os.path.join(directory, 'jobs.sqlite3'),
+            'LOG_LEVEL': 'WARNING',
+        })
+        output = subprocess.run([sys.executable, __file__, '--worker', json.dumps(scenario)], cwd=directory, env=env,
+                                capture_output=True, text=True)
+        if output.returncode != 0:
+            raise RuntimeError(output.stderr)
+        return json.loads(output.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--slides', type=int, nargs='+', default=[10, 40])
+    parser.add_argument('--images-per-slide', type=int, default=1)
+    parser.add_argument('--photos', action='store_true', help='Usar fotografías grandes en lugar de imágenes PNG pequeñas')
+    parser.add_argument('--measures', type=int, default=5, help='Criterios de la rúbrica')
+    parser.add_argument('--requests', type=int, default=8, help='Subidas por escenario')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--latency', type=float, default=0.2, help='Segundos por llamada simulada a OpenAI')
+    parser.add_argument('--vision-latency', type=float, default=0.2, help='Segundos por llamada simulada a Vision')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, BENCHMARKS_DIR)
+        worker(json.loads(args.worker))
+        return
+
+    print(f"{'slides':>6} {'concurrencia':>12} {'sol./s':>7} {'p50 (s)':>8} {'p95 (s)':>8} {'pico RSS (MB)':>14} {'OpenAI':>7} {'Vision':>7}")
+    for slides in args.slides:
+        for concurrency in args.concurrency:
+            result = run_scenario({
+                'slides': slides,
+                'images_per_slide': args.images_per_slide,
+                'photos': args.photos,
+                'measures': args.measures,
+                'requests': args.requests,
+                'concurrency': concurrency,
+                'latency': args.latency,
+                'vision_latency': args.vision_latency,
+            })
+            print(f"{slides:>6} {concurrency:>12} {result['throughput']:>7.2f} {result['p50']:>8.2f} {result['p95']:>8.2f} "
+                  f"{result['peak_rss']:>14.1f} {result['openai_calls']:>7} {result['vision_calls']:>7}")
+
+if __name__ == '__main__':
+    main()
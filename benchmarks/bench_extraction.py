@@ -0,0 +1,142 @@
+"""
+Compara la extracción antigua (cinco aperturas de la presentación) con la extracción
+en una sola pasada sobre presentaciones sintéticas, y verifica que ambas den el mismo resultado.
+
+Uso: python benchmarks/bench_extraction.py --slides 40 80 150
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from PIL import Image
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from extraction import extract_slides, slides_text, slide_titles, slide_subtitles, slide_body_texts, slide_images
+from synthetic import make_deck
+
+# Extractores originales de app.py, copiados sin cambios: cada uno abre y parsea la presentación
+def extract_text_from_ppt(filepath):
+    prs = Presentation(filepath)
+    text_runs = []
+    for slide in prs.slides:
+        for shape in slide.shapes:
+            if hasattr(shape, "text"):
+                text_runs.append(shape.text)
+    return "\n".join(text_runs)
+
+def extract_titles(filepath):
+    prs = Presentation(filepath)
+    titles = []
+    for slide in prs.slides:
+        for shape in slide.shapes:
+            if shape.has_text_frame:
+                title = shape.text_frame.text
+                if title:
+                    titles.append(title)
+                    break
+    return titles
+
+def extract_subtitles(filepath):
+    prs = Presentation(filepath)
+    subtitles = []
+    for slide in prs.slides:
+        subtitle_found = False
+        for shape in slide.shapes:
+            if shape.has_text_frame and not subtitle_found:
+                paragraphs = shape.text_frame.paragraphs
+                if len(paragraphs) > 1:
+                    subtitles.append(paragraphs[1].text)
+                    subtitle_found = True
+        if not subtitle_found:
+            subtitles.append("")
+    return subtitles
+
+def extract_body_texts(filepath, titles, subtitles):
+    prs = Presentation(filepath)
+    body_texts = []
+    for slide_idx, slide in enumerate(prs.slides):
+        body_text = []
+        for shape in slide.shapes:
+            if not shape.has_text_frame:
+                continue
+            for paragraph in shape.text_frame.paragraphs:
+                for run in paragraph.runs:
+                    font_size = run.font.size
+                    text = run.text.strip()
+                    if font_size and font_size < 2400000 and text not in titles and text not in subtitles:
+                        body_text.append(text)
+        body_texts.append('\n'.join(body_text))
+    return body_texts
+
+def extract_images(filepath):
+    prs = Presentation(filepath)
+    images = []
+
+    for slide_idx, slide in enumerate(prs.slides, start=1):
+        for shape in slide.shapes:
+            if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+                image = shape.image
+                image_bytes = io.BytesIO(image.blob)
+                pil_image = Image.open(image_bytes)
+                images.append((slide_idx, pil_image))  # Incluir el número de diapositiva y la imagen
+
+    return images
+
+def describe_images(images):
+    # Las imágenes de PIL no se comparan por contenido; basta con diapositiva, formato, tamaño y píxeles
+    return [(slide_idx, image.format, image.size, image.tobytes()) for slide_idx, image in images]
+
+def legacy_path(path):
+    # Como hacía uploader_file: cinco aperturas de la presentación
+    text = extract_text_from_ppt(path)
+    titles = extract_titles(path)
+    subtitles = extract_subtitles(path)
+    body_texts = extract_body_texts(path, titles, subtitles)
+    images = describe_images(extract_images(path))
+    return text, titles, subtitles, body_texts, images
+
+def single_pass(path):
+    slides = extract_slides(path)
+    titles = slide_titles(slides)
+    subtitles = slide_subtitles(slides)
+    return slides_text(slides), titles, subtitles, slide_body_texts(slides, titles, subtitles), describe_images(slide_images(slides))
+
+def measure(func, path, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(path)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--slides', type=int, nargs='+', default=[20, 80, 150])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'slides':>6} {'antiguo (s)':>12} {'una pasada (s)':>15} {'speedup':>8} {'pico antiguo (MB)':>18} {'pico nuevo (MB)':>16}")
+    for num_slides in args.slides:
+        with tempfile.NamedTemporaryFile(suffix='.pptx', delete=False) as deck:
+            deck.write(make_deck(num_slides))
+        try:
+            old_result, old_time, old_peak = measure(legacy_path, deck.name, args.repeat)
+            new_result, new_time, new_peak = measure(single_pass, deck.name, args.repeat)
+        finally:
+            os.remove(deck.name)
+        assert old_result == new_result, "Las dos rutas de extracción no coinciden"
+        print(f"{num_slides:>6} {old_time:>12.3f} {new_time:>15.3f} {old_time / new_time:>7.1f}x "
+              f"{old_peak / 2**20:>18.1f} {new_peak / 2**20:>16.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Mide el pico de memoria (RSS) del análisis de imágenes según la cantidad de imágenes de la
+presentación: la ruta antigua (todas las imágenes decodificadas en una lista) contra la ruta
+por lotes que consume las imágenes a medida que las envía. Cada medición corre en un proceso
+aparte para que los picos no se mezclen.
+
+Uso: python benchmarks/bench_image_memory.py --images 20 40 80
+"""
+import argparse
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # ru_maxrss está en KB en Linux
+
+def worker(mode, path):
+    from PIL import Image
+    from extraction import extract_slides, slide_images, iter_image_blobs
+    from vision_analysis import annotate_images
+    from fake_vision import fake_vision
+
+    slides = extract_slides(path)
+    baseline = peak_rss_mb()
+    with fake_vision(latency=0) as fake:
+        if mode == 'antiguo':
+            # Como antes: lista de imágenes PIL y cada una recodificada a PNG a resolución completa
+            images = slide_images(slides)
+            for slide_idx, image in images:
+                output = io.BytesIO()
+                image.save(output, format='PNG')
+                fake.label_detection(image=type('Imagen', (), {'content': output.getvalue()})())
+        else:
+            annotate_images(iter_image_blobs(slides))
+    print(f"{peak_rss_mb() - baseline:.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, nargs='+', default=[20, 40, 80])
+    parser.add_argument('--worker', nargs=2, metavar=('MODO', 'RUTA'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(*args.worker)
+        return
+
+    from synthetic import make_deck
+
+    print(f"{'imágenes':>9} {'antiguo (MB)':>13} {'por lotes (MB)':>15}")
+    for count in args.images:
+        with tempfile.NamedTemporaryFile(suffix='.pptx', delete=False) as deck:
+            deck.write(make_deck(count, images_per_slide=1, photos=True))
+        try:
+            peaks = []
+            for mode in ('antiguo', 'lotes'):
+                output = subprocess.run([sys.executable, __file__, '--worker', mode, deck.name],
+                                        capture_output=True, text=True, check=True)
+                peaks.append(float(output.stdout.strip().splitlines()[-1]))
+        finally:
+            os.remove(deck.name)
+        print(f"{count:>9} {peaks[0]:>13.1f} {peaks[1]:>15.1f}")
+
+if __name__ == '__main__':
+    main()
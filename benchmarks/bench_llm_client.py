@@ -0,0 +1,56 @@
+"""
+Simula varias subidas concurrentes que hacen las mismas preguntas a OpenAI y compara las
+llamadas directas con el cliente compartido (unión de solicitudes, límite de tasa y reintentos).
+El OpenAI falso responde 429 cada cierta cantidad de llamadas.
+
+Uso: python benchmarks/bench_llm_client.py --uploads 8 --questions 10 --latency 0.2
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import openai
+from llm import LLMClient
+from fake_openai import fake_openai
+
+def run_uploads(call, uploads, questions):
+    def upload(upload_idx):
+        failures = 0
+        for question in range(questions):
+            # Las preguntas se repiten entre subidas (misma rúbrica, mismo tema)
+            messages = [{"role": "user", "content": f"Pregunta {question}"}]
+            try:
+                call(model="gpt-4", messages=messages)
+            except openai.error.OpenAIError:
+                failures += 1
+        return failures
+
+    with ThreadPoolExecutor(max_workers=uploads) as executor:
+        return sum(executor.map(upload, range(uploads)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--uploads', type=int, default=8)
+    parser.add_argument('--questions', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--rate-limit-every', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'modo':<10} {'tiempo (s)':>11} {'llamadas':>9} {'fallidas':>9}")
+    with fake_openai(latency=args.latency, rate_limit_every=args.rate_limit_every) as fake:
+        start = time.perf_counter()
+        failures = run_uploads(openai.ChatCompletion.create, args.uploads, args.questions)
+        print(f"{'directo':<10} {time.perf_counter() - start:>11.2f} {fake.calls:>9} {failures:>9}")
+
+    with fake_openai(latency=args.latency, rate_limit_every=args.rate_limit_every) as fake:
+        client = LLMClient(backoff_base=0.1)
+        start = time.perf_counter()
+        failures = run_uploads(client.chat_completion, args.uploads, args.questions)
+        print(f"{'cliente':<10} {time.perf_counter() - start:>11.2f} {fake.calls:>9} {failures:>9}   {client.stats()}")
+
+if __name__ == '__main__':
+    main()
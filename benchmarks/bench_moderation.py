@@ -0,0 +1,56 @@
+"""
+Compara la moderación de contenido con y sin el filtro local de léxico: llamadas a GPT-4 y
+tiempo total para un lote de presentaciones donde solo algunas contienen términos del léxico,
+más la velocidad del filtro recorriendo una presentación grande. Usa un OpenAI falso.
+
+Uso: python benchmarks/bench_moderation.py --decks 20 --dirty 2 --slides 40 --latency 0.5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import app
+from llm import configure_cache
+from fake_openai import fake_openai
+
+def make_texts(deck_idx, num_slides, dirty):
+    texts = [f"Diapositiva {slide_idx + 1}\n" + "\n".join(f"Punto {line + 1} sobre la computadora del grupo {deck_idx + 1}, diapositiva {slide_idx + 1}"
+                                                          for line in range(4))
+             for slide_idx in range(num_slides)]
+    if dirty:
+        texts[num_slides // 2] += "\nEsta parte quedó como la mierda"
+    return texts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--decks', type=int, default=20, help='Presentaciones del lote')
+    parser.add_argument('--dirty', type=int, default=2, help='Presentaciones con términos del léxico')
+    parser.add_argument('--slides', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.5, help='Segundos por llamada simulada')
+    args = parser.parse_args()
+    app.create_app({'SLIDE_STORE_ENABLED': False})
+    configure_cache(None)  # Cada corrida debe llegar al OpenAI falso
+    word_filter = app.moderation_filter
+
+    decks = [make_texts(deck_idx, args.slides, deck_idx < args.dirty) for deck_idx in range(args.decks)]
+
+    print(f"{'filtro':<8} {'tiempo (s)':>11} {'llamadas':>9} {'con hallazgos':>14}")
+    for name, active_filter in (('sin', None), ('léxico', word_filter)):
+        app.moderation_filter = active_filter
+        with fake_openai(latency=args.latency, responder=lambda messages: "Contiene palabras inappropriate.") as fake:
+            start = time.perf_counter()
+            flagged = sum(1 for texts in decks if app.check_for_inappropriate_content(texts))
+            elapsed = time.perf_counter() - start
+        print(f"{name:<8} {elapsed:>11.2f} {fake.calls:>9} {flagged:>14}")
+
+    text = "\n".join(make_texts(0, 1000, False))
+    start = time.perf_counter()
+    word_filter.find(text)
+    elapsed = time.perf_counter() - start
+    print(f"\nFiltro local: {len(text) / 1e6:.2f} M caracteres en {elapsed:.3f} s ({len(text) / 1e6 / elapsed:.1f} M caracteres/s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Mide la extracción de varias presentaciones subidas a la vez: con hilos (como las peticiones
+concurrentes de un mismo worker, todas bajo el GIL) y con el pool de procesos de PARSE_PROCESSES.
+
+Uso: python benchmarks/bench_parse_pool.py --uploads 8 --slides 60 --processes 2 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from concurrency import create_process_pool
+from extraction import extract_presentation
+from synthetic import make_deck
+
+def run(decks, executor):
+    with ThreadPoolExecutor(max_workers=len(decks)) as uploads:
+        start = time.perf_counter()
+        results = list(uploads.map(lambda deck: extract_presentation(deck, 'presentacion.pptx', executor), decks))
+        return time.perf_counter() - start, results
+
+def positive_int(value):
+    if int(value) < 1:
+        raise argparse.ArgumentTypeError("debe ser al menos 1; la línea base ya mide la extracción sin procesos")
+    return int(value)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--uploads', type=int, default=8, help='Presentaciones extraídas simultáneamente')
+    parser.add_argument('--slides', type=int, default=60)
+    parser.add_argument('--processes', type=positive_int, nargs='+', default=[2, 4])
+    args = parser.parse_args()
+
+    decks = [make_deck(args.slides, images_per_slide=2, photos=True) for _ in range(args.uploads)]
+    baseline, expected = run(decks, None)
+    print(f"{'procesos':>8} {'tiempo (s)':>11} {'speedup':>8}")
+    print(f"{'hilos':>8} {baseline:>11.2f} {1:>8.2f}")
+    for processes in args.processes:
+        executor = create_process_pool(processes, preload=['extraction'])
+        try:
+            run(decks[:processes], executor)  # Arranque de los procesos fuera de la medición
+            elapsed, results = run(decks, executor)
+        finally:
+            executor.shutdown()
+        assert results == expected
+        print(f"{processes:>8} {elapsed:>11.2f} {baseline / elapsed:>8.2f}")
+
+if __name__ == '__main__':
+    main()
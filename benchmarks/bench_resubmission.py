@@ -0,0 +1,68 @@
+"""
+Mide cuánto cuesta volver a evaluar una presentación corregida: primero se analiza la versión
+original y luego una versión con pocas diapositivas cambiadas, contando las llamadas a Vision y a
+OpenAI de cada entrega. Usa un Vision y un OpenAI falsos y un SlideStore temporal.
+La descripción del tema se pide al modelo en cada entrega y el OpenAI falso la redacta distinto
+cada vez, como puede pasar cuando su entrada en la caché de respuestas expiró.
+
+Uso: python benchmarks/bench_resubmission.py --slides 40 --changed 3
+"""
+import argparse
+import io
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import app
+from extraction import extract_slides
+from llm import configure_cache
+from slide_store import SlideStore, slide_fingerprints
+from fake_openai import fake_openai
+from fake_vision import fake_vision
+from synthetic import make_deck
+
+THEME = "El ciclo del agua"
+descriptions = itertools.count(1)
+
+def respond(messages):
+    if "descripción del tema:" in messages[-1]["content"]:
+        return f"Descripción del tema, redacción {next(descriptions)}."
+    return "La diapositiva es coherente con el tema."
+
+def analyze(deck):
+    slides = extract_slides(io.BytesIO(deck))
+    titles, subtitles, body_texts = app.extract_slide_texts(slides)
+    analyzed_images = app.analyze_slide_images(slides)
+    topic_description = app.get_topic_description(THEME)
+    return app.check_slide_consistency(titles, subtitles, body_texts, analyzed_images, topic_description,
+                                       slide_keys=slide_fingerprints(slides, THEME))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--slides', type=int, default=40)
+    parser.add_argument('--changed', type=int, default=3, help='Diapositivas modificadas en la segunda entrega')
+    parser.add_argument('--latency', type=float, default=0.2, help='Segundos por llamada simulada')
+    args = parser.parse_args()
+    app.create_app({'SLIDE_STORE_ENABLED': False})
+    configure_cache(None)  # Solo el SlideStore evita llamadas repetidas
+
+    original = make_deck(args.slides)
+    revised = make_deck(args.slides, revised_slides=range(1, args.changed + 1))
+
+    with tempfile.TemporaryDirectory() as directory:
+        app.slide_store = SlideStore(os.path.join(directory, 'slides.sqlite3'))
+        print(f"{'entrega':<10} {'tiempo (s)':>11} {'llamadas Vision':>16} {'imágenes':>9} {'llamadas OpenAI':>16}")
+        for name, deck in (('original', original), ('corregida', revised)):
+            with fake_vision(latency=args.latency) as vision, fake_openai(latency=args.latency, responder=respond) as openai:
+                start = time.perf_counter()
+                slide_feedback = analyze(deck)
+                elapsed = time.perf_counter() - start
+            assert len(slide_feedback) == args.slides
+            print(f"{name:<10} {elapsed:>11.2f} {vision.calls:>16} {vision.images:>9} {openai.calls:>16}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Compara la verificación de consistencia una diapositiva por prompt contra lotes de varias
+diapositivas por prompt: llamadas, tokens enviados y recibidos, y tiempo total.
+
+Uso: python benchmarks/bench_slide_batching.py --slides 40 --latency 0.5 --batch-size 1 4 8
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import check_slide_consistency, create_app
+from llm import configure_cache
+from fake_openai import fake_openai
+
+def respond(messages):
+    # Las solicitudes por lote piden JSON; se responde una entrada por cada "Diapositiva N" del prompt
+    prompt = messages[-1]["content"]
+    if "objeto JSON" not in prompt:
+        return "La diapositiva es coherente con el tema."
+    slides = re.findall(r"Diapositiva (\d+):", prompt)
+    return json.dumps({slide: ["La diapositiva es coherente con el tema."] for slide in slides}, ensure_ascii=False)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--slides', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.5, help='Segundos por llamada simulada')
+    parser.add_argument('--batch-size', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--max-in-flight', type=int, default=4)
+    args = parser.parse_args()
+    create_app({'SLIDE_STORE_ENABLED': False})
+    configure_cache(None)  # Cada corrida debe llegar al OpenAI falso
+
+    titles = [f"Título de la diapositiva {idx + 1}" for idx in range(args.slides)]
+    subtitles = ["Subtítulo"] * args.slides
+    body_texts = [f"Contenido de la diapositiva {idx + 1}\nDetalle del punto principal" for idx in range(args.slides)]
+    analyzed_images = [(idx + 1, "logo, texto") for idx in range(args.slides)]
+    topic_description = "Descripción del tema de la presentación, con los objetivos y el público al que va dirigida. " * 5
+
+    print(f"{'lote':>5} {'tiempo (s)':>11} {'llamadas':>9} {'tokens enviados':>16} {'tokens recibidos':>17}")
+    for batch_size in args.batch_size:
+        with fake_openai(latency=args.latency, responder=respond) as fake:
+            start = time.perf_counter()
+            slide_feedback = check_slide_consistency(titles, subtitles, body_texts, analyzed_images, topic_description,
+                                                     max_in_flight=args.max_in_flight, batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+        assert [entry["slide"] for entry in slide_feedback] == list(range(1, args.slides + 1))
+        print(f"{batch_size:>5} {elapsed:>11.2f} {fake.calls:>9} {fake.prompt_tokens:>16} {fake.completion_tokens:>17}")
+
+if __name__ == '__main__':
+    main()
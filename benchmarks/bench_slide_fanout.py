@@ -0,0 +1,44 @@
+"""
+Compara check_slide_consistency secuencial contra el modo concurrente usando un OpenAI falso.
+
+Uso: python benchmarks/bench_slide_fanout.py --slides 40 --latency 0.5 --max-in-flight 1 4 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import check_slide_consistency, create_app
+from llm import configure_cache
+from fake_openai import fake_openai
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--slides', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.5, help='Segundos por llamada simulada')
+    parser.add_argument('--max-in-flight', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--fail-every', type=int, default=0, help='Simular un error cada n llamadas')
+    args = parser.parse_args()
+    create_app({'SLIDE_STORE_ENABLED': False})
+    configure_cache(None)  # Cada corrida debe llegar al OpenAI falso
+
+    titles = [f"Diapositiva {idx + 1}" for idx in range(args.slides)]
+    subtitles = ["Subtítulo"] * args.slides
+    body_texts = ["Texto del cuerpo"] * args.slides
+    analyzed_images = [(idx + 1, "logo, texto") for idx in range(args.slides)]
+
+    print(f"{'en curso':>8} {'tiempo (s)':>11} {'llamadas':>9} {'máx. simultáneas':>17} {'errores':>8}")
+    for max_in_flight in args.max_in_flight:
+        with fake_openai(latency=args.latency, fail_every=args.fail_every) as fake:
+            start = time.perf_counter()
+            slide_feedback = check_slide_consistency(titles, subtitles, body_texts, analyzed_images,
+                                                     "Descripción del tema", max_in_flight=max_in_flight)
+            elapsed = time.perf_counter() - start
+        assert [entry["slide"] for entry in slide_feedback] == list(range(1, args.slides + 1))
+        errors = sum(1 for entry in slide_feedback if entry["feedback"][0].startswith("Error"))
+        print(f"{max_in_flight:>8} {elapsed:>11.2f} {fake.calls:>9} {fake.max_in_flight:>17} {errors:>8}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Mide el arranque en frío de la aplicación: tiempo de 'import app', de create_app() y del
+calentamiento, cada uno en un proceso nuevo, más los módulos que más tardan en importarse
+según 'python -X importtime' y cuáles de las bibliotecas pesadas quedan cargadas.
+Como línea base, el modo 'ansioso' importa las bibliotecas pesadas junto con la aplicación,
+como lo hacía app.py antes de diferir esas importaciones.
+
+Uso: python benchmarks/bench_startup.py --repeat 5 --top 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+HEAVY_MODULES = ['fitz', 'pptx', 'pdfplumber', 'PIL.Image', 'openai', 'google.cloud.vision', 'tiktoken']
+
+# Se ejecuta en un proceso nuevo para que ningún módulo esté ya importado
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+for name in {preload!r}:
+    try:
+        __import__(name)
+    except ImportError:
+        pass
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+loaded = [name for name in {heavy!r} if name in sys.modules]
+app.warm_up()
+warm = time.perf_counter()
+print(json.dumps({{'import': imported - start, 'create_app': created - imported, 'warm_up': warm - created, 'loaded': loaded}}))
+"""
+
+def run(args, directory):
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(ROOT_DIR), LOG_LEVEL='WARNING', WARMUP='0')
+    return subprocess.run([sys.executable] + args, cwd=directory, env=env, capture_output=True, text=True, check=True)
+
+def import_times(directory, top):
+    # Formato de -X importtime: "import time: self [us] | cumulative | imported package"
+    output = run(['-X', 'importtime', '-c', 'import app'], directory)
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if len(name) - len(name.lstrip()) <= 3:  # El propio módulo y lo que importa directamente
+            rows.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='Procesos medidos')
+    parser.add_argument('--top', type=int, default=10, help='Módulos más lentos a mostrar')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'modo':<8} {'fase':<12} {'mediana (s)':>12} {'mín (s)':>8}")
+        for mode, preload in (('ansioso', HEAVY_MODULES), ('diferido', [])):
+            probe = PROBE.format(heavy=HEAVY_MODULES, preload=preload)
+            samples = [json.loads(run(['-c', probe], directory).stdout.strip().splitlines()[-1]) for _ in range(args.repeat)]
+            for phase in ('import', 'create_app', 'warm_up'):
+                values = [sample[phase] for sample in samples]
+                print(f"{mode:<8} {phase:<12} {statistics.median(values):>12.3f} {min(values):>8.3f}")
+        print(f"\nBibliotecas pesadas cargadas tras create_app() en modo diferido: {', '.join(samples[0]['loaded']) or 'ninguna'}")
+
+        print(f"\n{'módulo':<32} {'acumulado (s)':>14}")
+        for seconds, name in import_times(directory, args.top):
+            print(f"{name:<32} {seconds:>14.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Compara el análisis de imágenes antiguo (un cliente y una llamada por imagen, PNG a resolución
+completa) con el análisis por lotes con deduplicación y reducción de tamaño, usando un Vision falso.
+
+Uso: python benchmarks/bench_vision.py --slides 40 --latency 0.1
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from PIL import Image
+from google.cloud import vision
+from extraction import extract_slides
+from vision_analysis import annotate_images
+from fake_vision import fake_vision
+from synthetic import make_deck
+
+def legacy_annotate(client, images):
+    # Equivalente a analyze_image_google_cloud antes de este cambio: PNG completo y una llamada por imagen
+    results = []
+    for slide_idx, blob in images:
+        img_byte_arr = io.BytesIO()
+        Image.open(io.BytesIO(blob)).save(img_byte_arr, format='PNG')
+        response = client.label_detection(image=vision.Image(content=img_byte_arr.getvalue()))
+        results.append((slide_idx, ', '.join(label.description for label in response.label_annotations)))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--slides', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.1, help='Segundos por llamada simulada')
+    args = parser.parse_args()
+
+    print(f"{'escenario':<22} {'modo':<8} {'tiempo (s)':>11} {'llamadas':>9} {'imágenes':>9} {'KB enviados':>12}")
+    for name, unique_images in (('imágenes distintas', True), ('logo repetido', False)):
+        slides = extract_slides(io.BytesIO(make_deck(args.slides, images_per_slide=2, unique_images=unique_images)))
+        images = [(record["slide"], blob) for record in slides for blob in record["images"]]
+        for mode in ('antiguo', 'lotes'):
+            with fake_vision(latency=args.latency) as fake:
+                start = time.perf_counter()
+                if mode == 'antiguo':
+                    legacy_annotate(fake, images)
+                else:
+                    annotate_images(images)
+                elapsed = time.perf_counter() - start
+            print(f"{name:<22} {mode:<8} {elapsed:>11.2f} {fake.calls:>9} {fake.images:>9} {fake.bytes_sent / 1024:>12.1f}")
+
+if __name__ == '__main__':
+    main()
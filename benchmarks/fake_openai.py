@@ -0,0 +1,95 @@
+"""Reemplazo local de openai.ChatCompletion para medir rendimiento sin red ni credenciales."""
+import contextlib
+import json
+import re
+import threading
+import time
+import openai
+from prompts import count_tokens
+
+class FakeChatCompletion:
+    """
+    Imita openai.ChatCompletion.create con una latencia fija por llamada.
+    Args:
+        latency (float): Segundos que tarda cada llamada.
+        responder (callable): Recibe la lista de mensajes y devuelve el texto de la respuesta.
+        fail_every (int): Si es mayor a 0, cada n-ésima llamada lanza una excepción.
+        rate_limit_every (int): Si es mayor a 0, cada n-ésima llamada responde un 429 (RateLimitError).
+    """
+
+    def __init__(self, latency=0.5, responder=None, fail_every=0, rate_limit_every=0):
+        self.latency = latency
+        self.responder = responder or (lambda messages: "La diapositiva es coherente con el tema.")
+        self.fail_every = fail_every
+        self.rate_limit_every = rate_limit_every
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def create(self, model=None, messages=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            call_number = self.calls
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            if self.fail_every and call_number % self.fail_every == 0:
+                raise openai.error.APIError("Error simulado")
+            if self.rate_limit_every and call_number % self.rate_limit_every == 0:
+                raise openai.error.RateLimitError("Límite de tasa simulado", http_status=429)
+            content = self.responder(messages)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        prompt_tokens = sum(count_tokens(message["content"]) for message in messages)
+        completion_tokens = count_tokens(content)
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+        return {
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens}
+        }
+
+def pipeline_responder(messages):
+    """
+    Respuestas deterministas con el formato que espera cada paso del análisis, reconocido por
+    el prompt de sistema: verificación de rúbrica, medidas, tipos de puntos, puntajes en JSON y
+    consistencia por lotes en JSON. El resto recibe un texto de feedback.
+    """
+    system = messages[0]["content"]
+    prompt = messages[-1]["content"]
+    if "rubric used for evaluation" in system:
+        return "Sí, el texto es una rúbrica de evaluación."
+    if "extract the rubric statements" in system:
+        return "\n".join(sorted(set(re.findall(r"Criterio \d+", prompt)), key=lambda name: int(name.split()[1])))
+    if "type of points" in system:
+        points = sorted({int(point) for point in re.findall(r"(\d+) puntos", prompt)}, reverse=True)
+        return ", ".join(map(str, points or [4, 3, 2, 1]))
+    if "rubric measures and point types" in system:
+        measures = prompt.split("Medidas:")[1].split("Tipos de puntos:")[0].split("\n")
+        points = prompt.split("Tipos de puntos:")[1].strip().split("\n")[0]
+        best = points.split(",")[0].strip()
+        return json.dumps({"scores": [{"measure": measure.strip(), "score": int(best), "feedback": "Cumple el criterio."}
+                                      for measure in measures if measure.strip()]}, ensure_ascii=False)
+    if "JSON object keyed by slide number" in system:
+        slides = re.findall(r"Diapositiva (\d+):", prompt)
+        return json.dumps({slide: ["La diapositiva es coherente con el tema."] for slide in slides}, ensure_ascii=False)
+    return "La presentación es coherente con el tema.\nSe sugiere reforzar la conclusión."
+
+@contextlib.contextmanager
+def fake_openai(**kwargs):
+    """Instala un FakeChatCompletion en lugar de openai.ChatCompletion.create mientras dure el bloque."""
+    fake = FakeChatCompletion(**kwargs)
+    original = openai.ChatCompletion.create
+    openai.ChatCompletion.create = fake.create
+    try:
+        yield fake
+    finally:
+        openai.ChatCompletion.create = original
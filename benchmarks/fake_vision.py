@@ -0,0 +1,52 @@
+"""Cliente falso de Google Vision para probar y medir el análisis de imágenes sin credenciales."""
+import contextlib
+import hashlib
+import threading
+import time
+from types import SimpleNamespace
+import vision_analysis
+
+LABELS = ["Logo", "Texto", "Diagrama", "Fotografía", "Persona", "Gráfico", "Mapa", "Tabla"]
+
+class FakeImageAnnotatorClient:
+    """
+    Imita vision.ImageAnnotatorClient: responde etiquetas deterministas derivadas del contenido
+    de cada imagen y tarda latency segundos por llamada más per_image segundos por imagen.
+    """
+
+    def __init__(self, latency=0.2, per_image=0.0):
+        self.latency = latency
+        self.per_image = per_image
+        self.calls = 0
+        self.images = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+
+    def _labels(self, content):
+        seed = hashlib.sha256(content).digest()[0]
+        return [SimpleNamespace(description=LABELS[(seed + offset) % len(LABELS)], score=0.9) for offset in range(3)]
+
+    def _annotate(self, contents):
+        with self._lock:
+            self.calls += 1
+            self.images += len(contents)
+            self.bytes_sent += sum(len(content) for content in contents)
+        time.sleep(self.latency + self.per_image * len(contents))
+        return [SimpleNamespace(label_annotations=self._labels(content), error=SimpleNamespace(message=""))
+                for content in contents]
+
+    def label_detection(self, image=None, **kwargs):
+        return self._annotate([image.content])[0]
+
+    def batch_annotate_images(self, requests=None, **kwargs):
+        return SimpleNamespace(responses=self._annotate([request.image.content for request in requests]))
+
+@contextlib.contextmanager
+def fake_vision(**kwargs):
+    """Usa un FakeImageAnnotatorClient como cliente compartido de Vision mientras dure el bloque."""
+    fake = FakeImageAnnotatorClient(**kwargs)
+    vision_analysis.configure_client(fake)
+    try:
+        yield fake
+    finally:
+        vision_analysis.configure_client(None)
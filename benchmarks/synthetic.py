@@ -0,0 +1,91 @@
+"""Generadores de archivos sintéticos para los benchmarks."""
+import io
+import random
+import fitz
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches, Pt
+
+def make_png(seed, size=(320, 240)):
+    image = Image.new('RGB', size, ((seed * 37) % 256, (seed * 91) % 256, (seed * 53) % 256))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def make_photo(seed, size=(1600, 1200)):
+    """Imagen tipo fotografía: ruido de baja resolución ampliado y comprimido en JPEG."""
+    small = Image.frombytes('RGB', (size[0] // 10, size[1] // 10), random.Random(seed).randbytes(size[0] // 10 * size[1] // 10 * 3))
+    buffer = io.BytesIO()
+    small.resize(size, Image.BILINEAR).save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+def make_deck(num_slides, images_per_slide=1, unique_images=True, photos=False, revised_slides=()):
+    """
+    Genera una presentación .pptx sintética en memoria.
+    Args:
+        num_slides (int): Cantidad de diapositivas.
+        images_per_slide (int): Imágenes por diapositiva.
+        unique_images (bool): Si es False, todas las diapositivas repiten la misma imagen (logo).
+        photos (bool): Usar fotografías grandes en JPEG en lugar de imágenes PNG pequeñas.
+        revised_slides (iterable): Índices (desde 0) de las diapositivas con texto e imágenes
+            distintos, para simular una versión corregida de la misma presentación.
+    Returns:
+        bytes: Contenido del archivo .pptx.
+    """
+    prs = Presentation()
+    layout = prs.slide_layouts[1]  # Título y contenido
+    revised_slides = set(revised_slides)
+    for slide_idx in range(num_slides):
+        revision = " (corregida)" if slide_idx in revised_slides else ""
+        slide = prs.slides.add_slide(layout)
+        slide.shapes.title.text = f"Diapositiva {slide_idx + 1}"
+        text_frame = slide.placeholders[1].text_frame
+        text_frame.text = f"Subtítulo de la diapositiva {slide_idx + 1}"
+        for line in range(4):
+            run = text_frame.add_paragraph().add_run()
+            run.text = f"Punto {line + 1} sobre el tema de la diapositiva {slide_idx + 1}{revision}"
+            run.font.size = Pt(18)
+        for image_idx in range(images_per_slide):
+            seed = slide_idx * images_per_slide + image_idx if unique_images else 0
+            if revision:
+                seed += 1000
+            image = make_photo(seed) if photos else make_png(seed)
+            slide.shapes.add_picture(io.BytesIO(image), Inches(1 + image_idx), Inches(5), width=Inches(1))
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    return buffer.getvalue()
+
+def make_rubric_pdf(num_measures=5, points=(4, 3, 2, 1)):
+    """
+    Genera una rúbrica en PDF con una tabla dibujada (medida, descripción y una columna por
+    puntaje) que pdfplumber puede detectar. Las filas que no caben pasan a otra página.
+    Args:
+        num_measures (int): Cantidad de criterios (filas).
+        points (tuple): Puntajes posibles, de mayor a menor.
+    Returns:
+        bytes: Contenido del archivo PDF.
+    """
+    doc = fitz.open()
+    header = ["Criterio", "Descripción"] + [f"{point} puntos" for point in points]
+    widths = [120, 180] + [60] * len(points)
+    rows = [[f"Criterio {idx + 1}", f"Descripción del criterio {idx + 1}"] + [f"Nivel {point}" for point in points]
+            for idx in range(num_measures)]
+
+    def draw_row(page, y, row):
+        x = 40
+        for text, width in zip(row, widths):
+            page.draw_rect(fitz.Rect(x, y, x + width, y + 30), color=(0, 0, 0), width=0.8)
+            page.insert_text((x + 4, y + 18), text, fontsize=8)
+            x += width
+
+    page, y = None, 0
+    for row in rows:
+        if page is None or y + 30 > 800:
+            # Cada página repite el encabezado de la tabla, como en una rúbrica real
+            page = doc.new_page()
+            page.insert_text((40, 40), "Rúbrica de evaluación de la presentación", fontsize=14)
+            draw_row(page, 60, header)
+            y = 90
+        draw_row(page, y, row)
+        y += 30
+    return doc.tobytes()
@@ -0,0 +1,58 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+def map_bounded(func, items, max_in_flight):
+    """
+    Aplica func a cada elemento usando un pool de hilos con a lo más max_in_flight llamadas en curso.
+    Args:
+        func (callable): Función a aplicar; debe manejar sus propios errores si estos no deben propagarse.
+        items (iterable): Elementos a procesar.
+        max_in_flight (int): Máximo de llamadas simultáneas. Con 1 se ejecuta secuencialmente.
+    Returns:
+        list: Resultados en el mismo orden que items.
+    """
+    items = list(items)
+    if max_in_flight <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_in_flight, len(items))) as executor:
+        return list(executor.map(func, items))
+
+def imap_bounded(func, items, max_in_flight):
+    """
+    Versión perezosa de map_bounded: consume items solo cuando hay cupo y entrega los resultados
+    en orden. Como mucho max_in_flight elementos están en memoria a la vez.
+    """
+    if max_in_flight <= 1:
+        for item in items:
+            yield func(item)
+        return
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        pending = deque()
+        for item in items:
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+            pending.append(executor.submit(func, item))
+        while pending:
+            yield pending.popleft().result()
+
+def create_process_pool(processes, preload=()):
+    """
+    Pool de procesos para el trabajo de CPU (lectura de archivos, imágenes), o None si processes es 0.
+    Los procesos nacen de un forkserver que ya importó los módulos de preload, así que no heredan
+    los hilos ni las conexiones abiertas del servidor web.
+    """
+    if processes <= 0:
+        return None
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(list(preload))
+    else:
+        context = multiprocessing.get_context('spawn')
+    return ProcessPoolExecutor(max_workers=processes, mp_context=context)
+
+def run_in_pool(executor, func, *args):
+    """Ejecuta func en el pool de procesos y espera su resultado; sin pool, en el hilo actual."""
+    if executor is None:
+        return func(*args)
+    return executor.submit(func, *args).result()
@@ -0,0 +1,95 @@
+from collections import deque
+
+# Niveles de los términos del léxico
+INAPPROPRIATE = 'inadecuado'
+AMBIGUOUS = 'ambiguo'
+
+# Se comparan sin tildes ni mayúsculas; cada carácter se reemplaza por uno solo
+_ACCENTS = str.maketrans('áàäâéèëêíìïîóòöôúùüû', 'aaaaeeeeiiiioooouuuu')
+
+def normalize(text):
+    return text.lower().translate(_ACCENTS)
+
+def load_lexicon(paths):
+    """
+    Lee uno o más archivos de léxico: un término por línea, '#' para comentarios, '?' al inicio
+    para los términos ambiguos y '*' al final para aceptar cualquier terminación.
+    Args:
+        paths (list): Rutas de los archivos.
+    Returns:
+        dict: Término -> nivel (INAPPROPRIATE o AMBIGUOUS).
+    """
+    terms = {}
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                term = line.strip()
+                if not term or term.startswith('#'):
+                    continue
+                if term.startswith('?'):
+                    terms[term[1:].strip()] = AMBIGUOUS
+                else:
+                    terms[term] = INAPPROPRIATE
+    return terms
+
+class WordlistFilter:
+    """
+    Busca todos los términos de un léxico en una sola pasada sobre el texto (autómata de
+    Aho-Corasick): el tiempo es lineal en el largo del texto, sin importar cuántos términos haya.
+    Solo cuenta coincidencias de palabras completas, para que 'puta' no aparezca en 'computadora'.
+    Args:
+        terms (dict): Término -> nivel, como lo devuelve load_lexicon.
+    """
+
+    def __init__(self, terms):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for term, level in terms.items():
+            is_prefix = term.endswith('*')
+            term = term.rstrip('*').strip()
+            word = normalize(term)
+            if not word:
+                continue
+            node = 0
+            for char in word:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._output[node].append((len(word), term, level, is_prefix))
+
+        # Enlaces de falla por niveles: cada nodo apunta al sufijo más largo que también es prefijo de algún término
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text):
+        """
+        Returns:
+            dict: Términos encontrados en el texto -> nivel, en orden de aparición.
+        """
+        text = normalize(text)
+        found = {}
+        node = 0
+        for end, char in enumerate(text, 1):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, term, level, is_prefix in self._output[node]:
+                start = end - length
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if not is_prefix and end < len(text) and text[end].isalnum():
+                    continue
+                found.setdefault(term, level)
+        return found
@@ -0,0 +1,208 @@
+import io
+from concurrency import run_in_pool
+
+# python-pptx, PyMuPDF, pdfplumber y PIL se importan dentro de las funciones que los usan: son
+# lo más lento del arranque y cada proceso solo carga los que necesita
+
+# Tamaño de fuente (en EMU) bajo el cual un texto se considera parte del cuerpo
+BODY_FONT_SIZE_LIMIT = 2400000
+# EMU por punto tipográfico; los tamaños de PDF vienen en puntos
+EMU_PER_POINT = 12700
+# Formatos de imagen de un PDF que PIL y Vision leen sin convertir
+PDF_NATIVE_IMAGE_FORMATS = {'png', 'jpeg', 'jpg', 'bmp', 'gif', 'webp'}
+
+def extract_presentation(source, filename=None, executor=None, pdf_pages_per_task=25):
+    """
+    Extrae los registros por diapositiva según el tipo de archivo: los PDF se leen con PyMuPDF
+    y el resto con python-pptx.
+    Args:
+        source (str | bytes): Ruta o contenido del archivo.
+        filename (str): Nombre original, para reconocer el tipo cuando source son bytes.
+        executor (ProcessPoolExecutor): Opcional; la lectura se hace en sus procesos y solo los
+            registros (texto, tamaños y bytes de imágenes) vuelven al proceso principal.
+        pdf_pages_per_task (int): Páginas por tarea al repartir un PDF largo entre los procesos.
+    """
+    if (filename or source).lower().endswith('.pdf'):
+        return extract_pdf_slides(source, executor, pdf_pages_per_task)
+    return run_in_pool(executor, extract_slides, source)
+
+def extract_slides(source):
+    """
+    Recorre la presentación una sola vez y construye un registro por diapositiva.
+    Args:
+        source (str | bytes | file): Ruta, contenido o buffer del archivo .pptx.
+    Returns:
+        list: Lista de diccionarios con las llaves 'slide', 'texts', 'title',
+        'subtitle', 'runs' (texto, tamaño de fuente) e 'images' (bytes de cada imagen).
+    """
+    from pptx import Presentation
+    from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+    prs = Presentation(io.BytesIO(source) if isinstance(source, bytes) else source)
+    slides = []
+    for slide_idx, slide in enumerate(prs.slides, start=1):
+        record = {
+            "slide": slide_idx,
+            "texts": [],
+            "title": "",
+            "subtitle": "",
+            "runs": [],
+            "images": []
+        }
+        subtitle_found = False
+        for shape in slide.shapes:
+            if hasattr(shape, "text"):
+                record["texts"].append(shape.text)
+            if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+                record["images"].append(shape.image.blob)
+            if not shape.has_text_frame:
+                continue
+
+            text_frame = shape.text_frame
+            if not record["title"]:
+                record["title"] = text_frame.text  # El primer cuadro de texto no vacío es el título
+            paragraphs = text_frame.paragraphs
+            if not subtitle_found and len(paragraphs) > 1:
+                record["subtitle"] = paragraphs[1].text
+                subtitle_found = True
+            for paragraph in paragraphs:
+                for run in paragraph.runs:
+                    font_size = run.font.size
+                    record["runs"].append((run.text.strip(), int(font_size) if font_size else None))
+        slides.append(record)
+    return slides
+
+def slides_text(slides):
+    return "\n".join(text for record in slides for text in record["texts"])
+
+def texts_per_slide(slides):
+    return ["\n".join(record["texts"]) for record in slides]
+
+def slide_titles(slides):
+    return [record["title"] for record in slides if record["title"]]
+
+def slide_subtitles(slides):
+    return [record["subtitle"] for record in slides]
+
+def slide_body_texts(slides, titles, subtitles):
+    excluded = set(titles) | set(subtitles)
+    body_texts = []
+    for record in slides:
+        body_text = [text for text, font_size in record["runs"]
+                     if font_size and font_size < BODY_FONT_SIZE_LIMIT and text not in excluded]
+        body_texts.append('\n'.join(body_text))
+    return body_texts
+
+def iter_image_blobs(slides):
+    """Entrega (número de diapositiva, bytes de la imagen) sin decodificar ninguna imagen."""
+    for record in slides:
+        for blob in record["images"]:
+            yield record["slide"], blob
+
+def slide_images(slides):
+    from PIL import Image
+    images = []
+    for record in slides:
+        for blob in record["images"]:
+            images.append((record["slide"], Image.open(io.BytesIO(blob))))  # Incluir el número de diapositiva y la imagen
+    return images
+
+def extract_pdf_slides(source, executor=None, pages_per_task=25):
+    """
+    Construye los mismos registros que extract_slides a partir de un PDF, una página por diapositiva.
+    El título es la línea de mayor tamaño de fuente de la página y el subtítulo la primera línea
+    del segundo tamaño, si la página usa al menos tres tamaños. Como en python-pptx, sus runs no
+    llevan tamaño, así que no se cuentan en el cuerpo.
+    Args:
+        source (str | bytes | file): Ruta, bytes o buffer del PDF.
+        executor (ProcessPoolExecutor): Opcional; pool entre cuyos procesos se reparten las páginas.
+        pages_per_task (int): Páginas por tarea enviada al pool.
+    Returns:
+        list: Registros por diapositiva, como extract_slides.
+    """
+    if hasattr(source, 'read'):
+        source = source.read()
+    with open_pdf(source) as doc:
+        page_count = doc.page_count
+        if executor is None:
+            return [_pdf_page_record(page) for page in doc]
+
+    step = max(pages_per_task, 1)
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    parts = executor.map(_extract_pdf_pages, [source] * len(ranges), *zip(*ranges))
+    return [record for part in parts for record in part]
+
+def open_pdf(source):
+    """Abre un PDF a partir de su ruta o de su contenido en bytes."""
+    import fitz  # PyMuPDF
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype='pdf')
+    return fitz.open(source)
+
+def _extract_pdf_pages(source, start, stop):
+    # Se ejecuta en los procesos del pool: cada tarea abre su propia copia del documento
+    with open_pdf(source) as doc:
+        return [_pdf_page_record(doc[page_idx]) for page_idx in range(start, stop)]
+
+def _pdf_page_record(page):
+    record = {
+        "slide": page.number + 1,
+        "texts": [],
+        "title": "",
+        "subtitle": "",
+        "runs": [],
+        "images": []
+    }
+    lines = []
+    for block in page.get_text("dict")["blocks"]:
+        if block["type"] == 1:
+            record["images"].append(_pdf_image_blob(block))
+            continue
+        block_lines = []
+        for line in block["lines"]:
+            text = "".join(span["text"] for span in line["spans"]).strip()
+            if text:
+                block_lines.append(text)
+                lines.append((text, max(span["size"] for span in line["spans"])))
+        if block_lines:
+            record["texts"].append("\n".join(block_lines))
+
+    sizes = sorted({round(size, 1) for _, size in lines}, reverse=True)
+    title_idx = subtitle_idx = None
+    if sizes:
+        title_idx = next(idx for idx, (_, size) in enumerate(lines) if round(size, 1) == sizes[0])
+        record["title"] = lines[title_idx][0]
+    if len(sizes) >= 3:
+        subtitle_idx = next(idx for idx, (_, size) in enumerate(lines) if round(size, 1) == sizes[1])
+        record["subtitle"] = lines[subtitle_idx][0]
+    for idx, (text, size) in enumerate(lines):
+        record["runs"].append((text, None if idx in (title_idx, subtitle_idx) else int(size * EMU_PER_POINT)))
+    return record
+
+def _pdf_image_blob(block):
+    if block["ext"] in PDF_NATIVE_IMAGE_FORMATS:
+        return block["image"]
+    # JPEG 2000, JBIG2 y otros formatos de PDF se convierten a PNG
+    import fitz
+    return fitz.Pixmap(block["image"]).tobytes("png")
+
+def extract_pdf_table(source):
+    """
+    Extrae una tabla de un archivo PDF, incluyendo tablas que se extienden a lo largo de varias páginas.
+    Args:
+        source (str | bytes): La ruta o el contenido del archivo PDF.
+    Returns:
+        list: Lista de listas que representa la tabla extraída del PDF.
+    """
+    import pdfplumber
+
+    table = []
+    with pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source) as pdf:
+        for page in pdf.pages:
+            extracted_table = page.extract_table()
+            if extracted_table:
+                if not table:
+                    table.extend(extracted_table)  # Añadir la primera tabla completa
+                else:
+                    table.extend(extracted_table[1:])  # Añadir la tabla sin el encabezado
+    return table
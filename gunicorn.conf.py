@@ -0,0 +1,34 @@
+# Configuración de gunicorn para producción (gunicorn -c gunicorn.conf.py wsgi:app).
+# Todos los valores se pueden cambiar con variables de entorno.
+import glob
+import multiprocessing
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:8000')
+
+# Un proceso por núcleo para la lectura de archivos y el armado de prompts; varios hilos por proceso
+# porque casi todo el tiempo de una petición se pasa esperando a OpenAI y a Vision
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', 8))
+
+# /uploader responde cuando termina el análisis completo
+timeout = int(os.getenv('WEB_TIMEOUT', 300))
+graceful_timeout = timeout  # Al reiniciar, los trabajos en curso terminan antes de cerrar el proceso
+keepalive = 5
+
+# Sin preload_app: cada proceso crea sus propias conexiones, hilos y pool de procesos
+preload_app = False
+
+accesslog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+# Los procesos heredan el entorno: create_app() reparte las cuotas de OpenAI entre WEB_CONCURRENCY
+# procesos y publica las métricas en METRICS_DIR para que /metrics sume las de todos
+os.environ['WEB_CONCURRENCY'] = str(workers)
+os.environ.setdefault('METRICS_DIR', 'cache/metrics')
+
+def on_starting(server):
+    # Las métricas de una ejecución anterior del servidor no se suman a las de esta
+    for path in glob.glob(os.path.join(os.environ['METRICS_DIR'], 'metrics-*.json')):
+        os.remove(path)
@@ -0,0 +1,211 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Cada proceso renueva el latido de sus trabajos pendientes; un trabajo sin latido durante
+# JOB_STALE_AFTER segundos quedó huérfano (su proceso murió o se reinició) y se marca fallido
+HEARTBEAT_INTERVAL = 10
+JOB_STALE_AFTER = 60
+JOB_LOST_ERROR = "El análisis se interrumpió porque el servidor se reinició. Vuelve a enviar la presentación."
+
+class JobStore:
+    """
+    Estado de los análisis en segundo plano, guardado en SQLite para que cualquier hilo
+    (o proceso) pueda consultarlo.
+    Args:
+        path (str): Archivo SQLite.
+        ttl (float): Segundos que se conserva un trabajo antes de eliminarlo.
+        stale_after (float): Segundos sin latido tras los que un trabajo pendiente se da por perdido.
+    """
+
+    def __init__(self, path, ttl=24 * 3600, stale_after=JOB_STALE_AFTER):
+        self.path = path
+        self.ttl = ttl
+        self.stale_after = stale_after
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    stages_done INTEGER NOT NULL DEFAULT 0,
+                    stages_total INTEGER NOT NULL DEFAULT 0,
+                    slides_done INTEGER NOT NULL DEFAULT 0,
+                    slides_total INTEGER NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_events (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL,
+                    event TEXT NOT NULL,
+                    data TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS job_events_job ON job_events (job_id, seq)")
+            # Bases creadas antes de que los trabajos tuvieran dueño y latido
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if 'owner' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            if 'heartbeat_at' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def create(self, owner=None):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE updated_at < ?", (now - self.ttl,))
+            conn.execute("DELETE FROM job_events WHERE job_id NOT IN (SELECT id FROM jobs)")
+            conn.execute("INSERT INTO jobs (id, status, owner, heartbeat_at, created_at, updated_at) VALUES (?, 'queued', ?, ?, ?, ?)",
+                         (job_id, owner, now, now, now))
+        return job_id
+
+    def heartbeat(self, owner):
+        """Renueva el latido de los trabajos pendientes del proceso 'owner'."""
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status IN ('queued', 'running')", (time.time(), owner))
+
+    def fail_stale(self, job_id=None):
+        """
+        Marca como fallidos los trabajos pendientes sin latido reciente (todos, o solo job_id)
+        y publica su evento 'failed'. Si varios procesos lo hacen a la vez, solo uno lo consigue.
+        """
+        deadline = time.time() - self.stale_after
+        query = "SELECT id FROM jobs WHERE status IN ('queued', 'running') AND COALESCE(heartbeat_at, updated_at) < ?"
+        params = (deadline,)
+        if job_id is not None:
+            query += " AND id = ?"
+            params += (job_id,)
+        with self._connect() as conn:
+            for (stale_id,) in conn.execute(query, params).fetchall():
+                changed = conn.execute("UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ? AND status IN ('queued', 'running')",
+                                       (JOB_LOST_ERROR, time.time(), stale_id)).rowcount
+                if changed:
+                    logger.warning("Trabajo %s sin latido desde hace más de %ss; se marca fallido", stale_id, self.stale_after)
+                    conn.execute("INSERT INTO job_events (job_id, event, data) VALUES (?, 'failed', ?)",
+                                 (stale_id, json.dumps({'error': JOB_LOST_ERROR}, ensure_ascii=False)))
+
+    def update(self, job_id, **fields):
+        if 'result' in fields:
+            fields['result'] = json.dumps(fields['result'], ensure_ascii=False)
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def increment(self, job_id, field, **fields):
+        fields['updated_at'] = time.time()
+        assignments = ''.join(f", {name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {field} = {field} + 1{assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        self.fail_stale(job_id)
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        # El dueño y el latido son internos del servidor
+        job.pop('owner')
+        job.pop('heartbeat_at')
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def add_event(self, job_id, event, data):
+        with self._connect() as conn:
+            conn.execute("INSERT INTO job_events (job_id, event, data) VALUES (?, ?, ?)",
+                         (job_id, event, json.dumps(data, ensure_ascii=False)))
+
+    def events_since(self, job_id, seq=0):
+        """Eventos del trabajo posteriores a seq, como tuplas (seq, evento, datos en JSON)."""
+        with self._connect() as conn:
+            return conn.execute("SELECT seq, event, data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                                (job_id, seq)).fetchall()
+
+class JobProgress:
+    """Se entrega a la función del trabajo para que informe la etapa y el avance por diapositiva."""
+
+    def __init__(self, store, job_id):
+        self.store = store
+        self.job_id = job_id
+
+    def stages(self, total):
+        self.store.update(self.job_id, stages_total=total)
+
+    def stage_started(self, name):
+        self.store.update(self.job_id, stage=name)
+
+    def stage_finished(self, name, result=None):
+        self.store.increment(self.job_id, 'stages_done')
+
+    def slide_finished(self, feedback, total):
+        self.store.increment(self.job_id, 'slides_done', slides_total=total)
+        self.emit('slide', feedback)
+
+    def emit(self, event, data):
+        """Publica un resultado parcial para quienes siguen el trabajo en /jobs/<id>/events."""
+        self.store.add_event(self.job_id, event, data)
+
+class JobQueue:
+    """
+    Pool de hilos que ejecuta los trabajos fuera de la petición HTTP.
+    La función del trabajo recibe un JobProgress como argumento 'progress' y devuelve (resultado, error).
+    Mientras el proceso vive, un hilo renueva el latido de sus trabajos; al crearse, la cola marca
+    como fallidos los trabajos que quedaron huérfanos de procesos anteriores.
+    """
+
+    def __init__(self, store, max_workers=2, heartbeat_interval=HEARTBEAT_INTERVAL):
+        self.store = store
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.heartbeat_interval = min(heartbeat_interval, store.stale_after / 3)  # Varios latidos antes de darse por perdido
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self.store.fail_stale()
+        threading.Thread(target=self._heartbeat, name='job-heartbeat', daemon=True).start()
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            try:
+                self.store.heartbeat(self.owner)
+            except Exception:
+                logger.exception("Error al renovar el latido de los trabajos")
+
+    def submit(self, func, *args, **kwargs):
+        job_id = self.store.create(owner=self.owner)
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, func, args, kwargs):
+        self.store.update(job_id, status='running')
+        try:
+            result, error = func(*args, progress=JobProgress(self.store, job_id), **kwargs)
+        except Exception as e:
+            logger.exception("Error en el trabajo %s", job_id)
+            result, error = None, f"Error al analizar la presentación: {e}"
+        if error:
+            self.store.update(job_id, status='failed', error=error)
+            self.store.add_event(job_id, 'failed', {'error': error})
+        else:
+            self.store.update(job_id, status='done', stage=None, result=result)
+            self.store.add_event(job_id, 'done', {})
@@ -0,0 +1,213 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from llm_cache import cache_key
+from metrics import metrics
+from prompts import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Errores de OpenAI que vale la pena reintentar; el resto (p. ej. solicitud inválida) falla de inmediato
+RETRYABLE_ERRORS = ('RateLimitError', 'ServiceUnavailableError', 'APIConnectionError', 'Timeout', 'TryAgain')
+
+# Precio en dólares por 1000 tokens (prompt, completion), para estimar el costo en /metrics
+MODEL_PRICES = {
+    'gpt-4': (0.03, 0.06),
+    'gpt-4-32k': (0.06, 0.12),
+    'gpt-3.5-turbo': (0.0015, 0.002),
+}
+
+class TokenBucket:
+    """
+    Limitador de tasa: acumula hasta capacity unidades y las repone a capacity por minuto.
+    acquire bloquea hasta que haya unidades suficientes.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.available = float(per_minute)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                wait = (amount - self.available) / self.rate
+            time.sleep(wait)
+
+class LLMClient:
+    """
+    Punto único de acceso a openai.ChatCompletion.create.
+
+    - Las llamadas corren en un pool de hilos de larga vida; cada hilo conserva su sesión HTTP de
+      openai, así que las conexiones keep-alive se reutilizan entre peticiones.
+    - Los límites de solicitudes y tokens por minuto se respetan con token buckets.
+    - Los errores transitorios (429, 503, conexión) se reintentan con backoff exponencial y jitter.
+    - Las solicitudes idénticas en curso se unen: solo una sale a la red y todas reciben su respuesta.
+    - Si hay caché, una respuesta ya conocida no sale a la red. Con validate, solo se guardan (y se
+      reutilizan) las respuestas que el llamador puede interpretar; una inválida vuelve a pedirse.
+    El paquete openai se importa en la primera llamada, no al crear el cliente.
+    Args:
+        cache (LLMCache): Caché de respuestas, opcional.
+        api_key (str): Clave de OpenAI; None usa la configurada en el paquete o en OPENAI_API_KEY.
+        max_connections (int): Llamadas simultáneas a OpenAI en todo el proceso.
+        requests_per_minute (int): Cuota de solicitudes por minuto; None sin límite.
+        tokens_per_minute (int): Cuota de tokens por minuto; None sin límite.
+        max_retries (int): Reintentos ante errores transitorios.
+        backoff_base (float): Espera base en segundos del primer reintento.
+        backoff_max (float): Espera máxima en segundos entre reintentos.
+    """
+
+    def __init__(self, cache=None, max_connections=16, requests_per_minute=None, tokens_per_minute=None,
+                 max_retries=5, backoff_base=1.0, backoff_max=60.0, api_key=None):
+        self.cache = cache
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix='openai')
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.coalesced = 0
+
+    def chat_completion(self, model, messages, purpose='otro', validate=None, **params):
+        key = cache_key(model, messages, params)
+        if self.cache is not None:
+            response = self.cache.get(key)
+            if response is not None and _is_valid(validate, response):
+                metrics.inc('llm_requests_total', model=model, purpose=purpose, outcome='cache')
+                return response
+            if response is not None:
+                self.cache.delete(key)  # Respuesta guardada antes de validarse; se pide de nuevo
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is None:
+                future = self._executor.submit(self._call, model, messages, params, key, purpose, validate)
+                self._in_flight[key] = future
+                future.add_done_callback(lambda _: self._forget(key))
+            else:
+                self.coalesced += 1
+                metrics.inc('llm_requests_total', model=model, purpose=purpose, outcome='coalesced')
+        return future.result()
+
+    def _forget(self, key):
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def _call(self, model, messages, params, key, purpose, validate=None):
+        import openai
+        if self.api_key:
+            openai.api_key = self.api_key
+
+        tokens = sum(count_tokens(message['content']) for message in messages) + params.get('max_tokens', 0) if self._tokens else 0
+
+        attempt = 0
+        start = time.perf_counter()
+        while True:
+            # Cada intento, también los reintentos tras un 429 o 503, se descuenta de la cuota
+            if self._requests:
+                self._requests.acquire()
+            if self._tokens:
+                self._tokens.acquire(tokens)
+            try:
+                with self._lock:
+                    self.calls += 1
+                response = openai.ChatCompletion.create(model=model, messages=messages, **params)
+                break
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    metrics.inc('llm_requests_total', model=model, purpose=purpose, outcome='error')
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                logger.warning("OpenAI: %s; reintento %d de %d en %.1fs", e.__class__.__name__, attempt, self.max_retries, delay)
+                time.sleep(delay)
+
+        elapsed = time.perf_counter() - start
+        usage = response.get('usage') or {}
+        prompt_tokens = usage.get('prompt_tokens', 0)
+        completion_tokens = usage.get('completion_tokens', 0)
+        metrics.inc('llm_requests_total', model=model, purpose=purpose, outcome='ok')
+        metrics.observe('llm_request_duration_seconds', elapsed, model=model, purpose=purpose)
+        metrics.inc('llm_tokens_total', prompt_tokens, model=model, purpose=purpose, type='prompt')
+        metrics.inc('llm_tokens_total', completion_tokens, model=model, purpose=purpose, type='completion')
+        if model in MODEL_PRICES:
+            prompt_price, completion_price = MODEL_PRICES[model]
+            metrics.inc('llm_cost_usd_total', (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000, model=model, purpose=purpose)
+        logger.debug("OpenAI %s (%s): %.2fs, %d tokens de prompt, %d de respuesta, %d reintentos",
+                     model, purpose, elapsed, prompt_tokens, completion_tokens, attempt)
+
+        if self.cache is not None and _is_valid(validate, response):
+            self.cache.set(key, response)
+        return response
+
+    def _is_retryable(self, e):
+        import openai
+        if isinstance(e, tuple(getattr(openai.error, name) for name in RETRYABLE_ERRORS)):
+            return True
+        return isinstance(e, openai.error.APIError) and (e.http_status or 0) >= 500
+
+    def _backoff_delay(self, attempt, e):
+        # Si la API indica cuánto esperar se respeta; si no, backoff exponencial con jitter completo
+        retry_after = (getattr(e, 'headers', None) or {}).get('retry-after')
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "retries": self.retries, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
+
+def _is_valid(validate, response):
+    if validate is None:
+        return True
+    try:
+        return bool(validate(response))
+    except Exception:
+        return False
+
+_client = LLMClient()
+
+def configure_client(client):
+    """Reemplaza el cliente usado por chat_completion."""
+    global _client
+    _client = client
+
+def get_client():
+    return _client
+
+def configure_cache(cache):
+    """Define la caché del cliente actual; None la desactiva."""
+    _client.cache = cache
+
+def get_cache():
+    return _client.cache
+
+def chat_completion(model, messages, purpose='otro', validate=None, **params):
+    """
+    Llama a openai.ChatCompletion.create a través del cliente compartido: caché, unión de
+    solicitudes idénticas, límite de tasa y reintentos. purpose etiqueta la llamada en /metrics.
+    validate recibe la respuesta y devuelve False si no se puede interpretar: esa respuesta se
+    entrega igual, pero no se guarda en la caché.
+    """
+    return _client.chat_completion(model, messages, purpose=purpose, validate=validate, **params)
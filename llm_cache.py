@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+def cache_key(model, messages, params):
+    """Clave de contenido: hash del modelo, los mensajes y los parámetros de la llamada."""
+    payload = json.dumps({"model": model, "messages": messages, "params": params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class LLMCache:
+    """
+    Caché de respuestas de OpenAI en dos niveles: un LRU en memoria y una base SQLite en disco.
+    Ambos niveles expiran las entradas después de ttl segundos y se limitan por cantidad de entradas.
+    Args:
+        path (str): Archivo SQLite; None desactiva el nivel en disco.
+        ttl (float): Segundos de vida de cada respuesta.
+        max_memory_entries (int): Tamaño máximo del LRU en memoria.
+        max_disk_entries (int): Tamaño máximo de la tabla en disco.
+    """
+
+    def __init__(self, path=None, ttl=7 * 24 * 3600, max_memory_entries=512, max_disk_entries=10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if path:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS llm_responses (
+                        key TEXT PRIMARY KEY,
+                        response TEXT NOT NULL,
+                        expires_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS llm_responses_accessed ON llm_responses (accessed_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, response = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return response
+                del self._memory[key]
+
+        if self.path:
+            with self._connect() as conn:
+                row = conn.execute("SELECT response, expires_at FROM llm_responses WHERE key = ? AND expires_at > ?", (key, now)).fetchone()
+                if row:
+                    conn.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, key))
+            if row:
+                response = json.loads(row[0])
+                self._remember(key, row[1], response)
+                with self._lock:
+                    self.disk_hits += 1
+                return response
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, response):
+        now = time.time()
+        expires_at = now + self.ttl
+        self._remember(key, expires_at, response)
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO llm_responses (key, response, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                             (key, json.dumps(response, ensure_ascii=False), expires_at, now))
+                conn.execute("DELETE FROM llm_responses WHERE expires_at <= ?", (now,))
+                # Eliminar las entradas usadas hace más tiempo si se supera el tamaño máximo
+                conn.execute("DELETE FROM llm_responses WHERE key IN (SELECT key FROM llm_responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                             (self.max_disk_entries,))
+
+    def _remember(self, key, expires_at, response):
+        with self._lock:
+            self._memory[key] = (expires_at, response)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM llm_responses")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory)
+            }
@@ -0,0 +1,140 @@
+import glob
+import json
+import os
+import threading
+import time
+
+# Límites en segundos de los histogramas de latencia
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+class Metrics:
+    """
+    Registro de métricas en memoria del proceso (contadores e histogramas con etiquetas),
+    exportado en el formato de texto de Prometheus por render().
+    Con varios procesos (gunicorn), share() hace que cada uno publique sus valores en una carpeta
+    común y que render() sume los de todos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._types = {}
+        self._buckets = {}
+        self._counters = {}
+        self._histograms = {}
+        self._directory = None
+
+    def counter(self, name, help_text):
+        self._help[name] = help_text
+        self._types[name] = 'counter'
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self._help[name] = help_text
+        self._types[name] = 'histogram'
+        self._buckets[name] = tuple(buckets)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        buckets = self._buckets.get(name, DEFAULT_BUCKETS)
+        with self._lock:
+            counts, total, count = self._histograms.get(key, ([0] * len(buckets), 0.0, 0))
+            counts = [bucket_count + (value <= bound) for bucket_count, bound in zip(counts, buckets)]
+            self._histograms[key] = (counts, total + value, count + 1)
+
+    def share(self, directory, interval=10):
+        """
+        Publica los valores de este proceso en 'directory' cada 'interval' segundos y en cada render().
+        Los archivos de procesos terminados se conservan, para que los contadores no retrocedan.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+
+        def publish_periodically():
+            while True:
+                time.sleep(interval)
+                self._publish()
+
+        threading.Thread(target=publish_periodically, name='metrics', daemon=True).start()
+
+    def _snapshot(self):
+        with self._lock:
+            return dict(self._counters), dict(self._histograms)
+
+    def _publish(self):
+        counters, histograms = self._snapshot()
+        data = {
+            'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+            'histograms': [[name, labels, counts, total, count] for (name, labels), (counts, total, count) in histograms.items()],
+        }
+        path = os.path.join(self._directory, f"metrics-{os.getpid()}.json")
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(data, f)
+        os.replace(f"{path}.tmp", path)  # Los lectores nunca ven un archivo a medio escribir
+
+    def _shared_snapshot(self):
+        # Suma los valores publicados por todos los procesos, incluido este
+        self._publish()
+        counters, histograms = {}, {}
+        for path in glob.glob(os.path.join(self._directory, 'metrics-*.json')):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, labels, value in data['counters']:
+                key = (name, tuple(tuple(label) for label in labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, counts, total, count in data['histograms']:
+                key = (name, tuple(tuple(label) for label in labels))
+                previous_counts, previous_total, previous_count = histograms.get(key, ([0] * len(counts), 0.0, 0))
+                histograms[key] = ([a + b for a, b in zip(previous_counts, counts)], previous_total + total, previous_count + count)
+        return counters, histograms
+
+    def render(self):
+        counters, histograms = self._shared_snapshot() if self._directory else self._snapshot()
+
+        lines = []
+        for name in sorted(self._types):
+            lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {self._types[name]}")
+            if self._types[name] == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, bucket_count in zip(self._buckets[name], counts):
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', _format_value(bound)),))} {bucket_count}")
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+metrics = Metrics()
+metrics.histogram('stage_duration_seconds', 'Duración de cada etapa del análisis.')
+metrics.counter('analysis_total', 'Análisis completos por resultado.')
+metrics.histogram('analysis_duration_seconds', 'Duración total de un análisis.')
+metrics.counter('llm_requests_total', 'Llamadas a OpenAI por modelo, propósito y resultado.')
+metrics.histogram('llm_request_duration_seconds', 'Latencia de las llamadas a OpenAI, incluidos los reintentos.')
+metrics.counter('llm_tokens_total', 'Tokens de OpenAI por modelo, propósito y tipo (prompt o completion).')
+metrics.counter('llm_cost_usd_total', 'Costo estimado en dólares de las llamadas a OpenAI.')
+metrics.counter('moderation_prefilter_total', 'Presentaciones revisadas por el filtro local, por resultado (limpia o escalada).')
+metrics.counter('vision_requests_total', 'Llamadas a batch_annotate_images de Vision.')
+metrics.counter('vision_images_total', 'Imágenes enviadas a Vision.')
+metrics.histogram('vision_request_duration_seconds', 'Latencia de las llamadas a Vision.')
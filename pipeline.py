@@ -0,0 +1,82 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+def run_stages(stages, max_workers=8, on_start=None, on_finish=None):
+    """
+    Ejecuta un grafo de etapas; cada etapa se lanza apenas sus dependencias terminan.
+    Args:
+        stages (dict): Nombre de la etapa -> (función, [nombres de dependencias]). La función
+            recibe los resultados de sus dependencias como argumentos posicionales, en orden.
+        max_workers (int): Máximo de etapas ejecutándose a la vez.
+        on_start (callable): Opcional; se llama con el nombre de cada etapa al comenzar.
+        on_finish (callable): Opcional; se llama con el nombre y el resultado de cada etapa al terminar sin errores.
+    Returns:
+        tuple: (resultados por etapa, tiempos por etapa como (inicio, fin) relativos al arranque).
+    """
+    for name, (_, deps) in stages.items():
+        for dep in deps:
+            if dep not in stages:
+                raise ValueError(f"La etapa '{name}' depende de '{dep}', que no existe")
+
+    results = {}
+    timings = {}
+    pending = dict(stages)
+    running = {}
+    origin = time.perf_counter()
+
+    def timed(name, func, args):
+        start = time.perf_counter() - origin
+        if on_start:
+            on_start(name)
+        try:
+            result = func(*args)
+        finally:
+            timings[name] = (start, time.perf_counter() - origin)
+        if on_finish:
+            on_finish(name, result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            ready = [name for name, (_, deps) in pending.items() if all(dep in results for dep in deps)]
+            for name in ready:
+                func, deps = pending.pop(name)
+                running[executor.submit(timed, name, func, [results[dep] for dep in deps])] = name
+            if not running:
+                raise ValueError(f"Dependencias cíclicas entre las etapas: {', '.join(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+
+    return results, timings
+
+def critical_path(stages, timings):
+    """
+    Reconstruye la ruta crítica: desde la etapa que terminó al último, sigue hacia atrás
+    la dependencia que terminó más tarde.
+    Returns:
+        list: Nombres de las etapas de la ruta crítica, en orden de ejecución.
+    """
+    if not timings:
+        return []
+    path = [max(timings, key=lambda name: timings[name][1])]
+    while stages[path[-1]][1]:
+        path.append(max(stages[path[-1]][1], key=lambda name: timings[name][1]))
+    return path[::-1]
+
+def log_timings(stages, timings):
+    for name, (start, end) in sorted(timings.items(), key=lambda item: item[1][0]):
+        logger.info("Etapa %-22s inicio %7.3fs  duración %7.3fs", name, start, end - start)
+    path = critical_path(stages, timings)
+    if path:
+        logger.info("Ruta crítica: %s (%.3fs)", " -> ".join(path), timings[path[-1]][1])
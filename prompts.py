@@ -0,0 +1,193 @@
+import json
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+# Caracteres por token usados cuando tiktoken no está instalado; bajo a propósito para no pasarse del contexto
+CHARS_PER_TOKEN = 3
+
+_encoding = None
+
+def _get_encoding():
+    """
+    Codificador de gpt-4, o None si tiktoken no está disponible o no pudo cargar su vocabulario.
+    tiktoken se importa en el primer uso para no alargar el arranque.
+    """
+    global _encoding
+    if _encoding is None:
+        _encoding = False
+        try:
+            import tiktoken
+            _encoding = tiktoken.encoding_for_model("gpt-4")
+        except ImportError:
+            pass  # Sin tiktoken se usa una estimación conservadora por caracteres
+        except Exception as e:
+            logger.warning("Error al cargar el codificador de tokens, se usará una estimación: %s", e)
+    return _encoding or None
+
+def count_tokens(text):
+    """Cuenta los tokens de text localmente, sin llamar a la API."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def truncate_to_budget(text, budget):
+    """Recorta text para que no supere budget tokens."""
+    if count_tokens(text) <= budget:
+        return text
+    encoding = _get_encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:budget])
+    return text[:budget * CHARS_PER_TOKEN]
+
+def dedupe_lines(text):
+    """Elimina las líneas repetidas (encabezados de página, pies de diapositiva) conservando la primera aparición."""
+    seen = set()
+    lines = []
+    for line in text.split('\n'):
+        key = line.strip()
+        if key and key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return '\n'.join(lines)
+
+def split_into_chunks(text, budget):
+    """
+    Divide text en fragmentos de a lo más budget tokens, cortando entre líneas siempre que se pueda.
+    Returns:
+        list: Fragmentos en orden; una lista vacía si text está vacío.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    for line in text.split('\n'):
+        line_tokens = count_tokens(line) + 1
+        if line_tokens > budget:
+            # Una sola línea más grande que el presupuesto se corta en pedazos
+            while line:
+                piece = line[:budget * CHARS_PER_TOKEN]
+                line = line[len(piece):]
+                if current:
+                    chunks.append('\n'.join(current))
+                    current, current_tokens = [], 0
+                chunks.append(piece)
+            continue
+        if current_tokens + line_tokens > budget:
+            chunks.append('\n'.join(current))
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current and any(line.strip() for line in current):
+        chunks.append('\n'.join(current))
+    return chunks
+
+def fit_texts(texts, budget):
+    """
+    Reparte budget tokens entre varios textos de forma equitativa: los textos cortos se conservan
+    completos y solo se recortan los más largos, todos al mismo tope.
+    Returns:
+        list: Los textos recortados, en el mismo orden.
+    """
+    sizes = [count_tokens(text) for text in texts]
+    if sum(sizes) <= budget:
+        return list(texts)
+
+    remaining = budget
+    cap = 0
+    ordered = sorted(sizes)
+    for position, size in enumerate(ordered):
+        share = remaining // (len(ordered) - position)
+        if size > share:
+            cap = share
+            break
+        remaining -= size
+    return [text if size <= cap else truncate_to_budget(text, cap) for text, size in zip(texts, sizes)]
+
+def fit_presentation(titles, subtitles, body_texts, images_info, budget):
+    """
+    Ajusta el contenido de la presentación a budget tokens para los prompts de evaluación.
+    Los títulos y subtítulos se conservan; las etiquetas de imágenes y las líneas del cuerpo repetidas
+    se eliminan; los textos del cuerpo se recortan de forma equitativa con el presupuesto que queda.
+    Returns:
+        tuple: (títulos, subtítulos, textos del cuerpo, información de imágenes) ajustados.
+    """
+    seen = set()
+    unique_images = []
+    for slide_idx, info in images_info:
+        if info not in seen:
+            seen.add(info)
+            unique_images.append((slide_idx, info))
+
+    # Las líneas repetidas en varias diapositivas (pies de página, logos de texto) se envían una sola vez
+    seen = set()
+    unique_bodies = []
+    for body_text in body_texts:
+        lines = []
+        for line in body_text.split('\n'):
+            if line.strip() and line.strip() in seen:
+                continue
+            seen.add(line.strip())
+            lines.append(line)
+        unique_bodies.append('\n'.join(lines))
+
+    fixed = sum(count_tokens(text) + 1 for text in titles + subtitles)
+    images_tokens = sum(count_tokens(info) + 4 for _, info in unique_images)
+    if fixed + images_tokens > budget:
+        # Sin espacio para todo: las imágenes usan hasta 1/4 del presupuesto y títulos y subtítulos hasta 1/2
+        kept = []
+        images_budget = budget // 4
+        for slide_idx, info in unique_images:
+            images_budget -= count_tokens(info) + 4
+            if images_budget < 0:
+                break
+            kept.append((slide_idx, info))
+        unique_images = kept
+        titles = fit_texts(titles, budget // 4)
+        subtitles = fit_texts(subtitles, budget // 4)
+        fixed = sum(count_tokens(text) + 1 for text in titles + subtitles)
+        images_tokens = sum(count_tokens(info) + 4 for _, info in unique_images)
+
+    body_budget = max(0, budget - fixed - images_tokens)
+    return titles, subtitles, fit_texts(unique_bodies, body_budget), unique_images
+
+def pack_by_budget(items, costs, max_items, budget):
+    """
+    Agrupa items en lotes consecutivos de a lo más max_items elementos y budget tokens de costo.
+    Un elemento que por sí solo supera el presupuesto queda en un lote propio.
+    Returns:
+        list: Lista de lotes (listas de items), en el orden original.
+    """
+    batches = []
+    current = []
+    current_cost = 0
+    for item, cost in zip(items, costs):
+        if current and (len(current) >= max_items or current_cost + cost > budget):
+            batches.append(current)
+            current, current_cost = [], 0
+        current.append(item)
+        current_cost += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def parse_json_object(text):
+    """
+    Extrae el objeto JSON de una respuesta del modelo, aunque venga dentro de un bloque de código
+    o con texto alrededor.
+    Returns:
+        dict: El objeto, o None si la respuesta no contiene un objeto JSON válido.
+    """
+    start = text.find('{')
+    end = text.rfind('}')
+    if start == -1 or end <= start:
+        return None
+    try:
+        value = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
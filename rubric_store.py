@@ -0,0 +1,36 @@
+import json
+import os
+import sqlite3
+
+class RubricStore:
+    """
+    Guarda en SQLite el resultado de procesar una rúbrica (veredicto, medidas, tipo de puntos,
+    puntaje máximo y tabla HTML), indexado por la huella del archivo (SHA-256 del contenido).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rubrics (
+                    fingerprint TEXT PRIMARY KEY,
+                    record TEXT NOT NULL
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, fingerprint):
+        with self._connect() as conn:
+            row = conn.execute("SELECT record FROM rubrics WHERE fingerprint = ?", (fingerprint,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, fingerprint, record):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO rubrics (fingerprint, record) VALUES (?, ?)",
+                         (fingerprint, json.dumps(record, ensure_ascii=False)))
@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+def slide_fingerprint(*parts):
+    """Huella de un resultado por diapositiva: hash SHA-256 de todas las entradas que lo determinan."""
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def slide_fingerprints(slides, *context):
+    """
+    Huella del contenido de cada diapositiva: sus runs de texto (con tamaño de fuente) y el hash
+    SHA-256 de sus imágenes, más el contexto dado por el usuario (p. ej. el tema). No incluye
+    textos generados por los modelos, que pueden cambiar entre una entrega y la siguiente.
+    """
+    return [slide_fingerprint(record['runs'], [hashlib.sha256(blob).hexdigest() for blob in record['images']], *context)
+            for record in slides]
+
+class SlideStore:
+    """
+    Guarda en SQLite los resultados por diapositiva (etiquetas de Vision por imagen, feedback de
+    consistencia por diapositiva), indexados por tipo de resultado y huella del contenido.
+    Cuando se vuelve a subir una presentación corregida, solo las diapositivas que cambiaron
+    llegan a las APIs.
+    Args:
+        path (str): Archivo SQLite.
+        ttl (float): Segundos que se conserva un resultado sin usarse.
+    """
+
+    def __init__(self, path, ttl=30 * 24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS slide_results (
+                    kind TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    used_at REAL NOT NULL,
+                    PRIMARY KEY (kind, fingerprint)
+                )
+            """)
+            conn.execute("DELETE FROM slide_results WHERE used_at < ?", (time.time() - self.ttl,))
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, kind, fingerprint):
+        with self._connect() as conn:
+            row = conn.execute("SELECT result FROM slide_results WHERE kind = ? AND fingerprint = ? AND used_at >= ?",
+                               (kind, fingerprint, time.time() - self.ttl)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE slide_results SET used_at = ? WHERE kind = ? AND fingerprint = ?",
+                         (time.time(), kind, fingerprint))
+        return json.loads(row[0])
+
+    def put(self, kind, fingerprint, result):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO slide_results (kind, fingerprint, result, used_at) VALUES (?, ?, ?, ?)",
+                         (kind, fingerprint, json.dumps(result, ensure_ascii=False), time.time()))
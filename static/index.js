@@ -7,24 +7,72 @@ document.addEventListener('DOMContentLoaded', function () {
     const form = document.querySelector('form');
     const estadoElement = document.getElementById('Estado');
 
-    const estados = [
-        "Cargando archivo...",
-        "Analizando PDF...",
-        "Analizando PPT...",
-        "Extrayendo datos PPT...",
-        "Realizando feedback..."
-    ];
+    // Texto de #Estado para cada etapa informada por /jobs/<id>
+    const estados = {
+        queued: "En cola...",
+        slides: "Extrayendo datos PPT...",
+        slide_texts: "Extrayendo datos PPT...",
+        inappropriate_content: "Analizando PPT...",
+        analyzed_images: "Analizando imágenes...",
+        topic_description: "Analizando el tema...",
+        rubric_text: "Analizando PDF...",
+        rubric_table_html: "Analizando PDF...",
+        is_rubric: "Analizando PDF...",
+        measures: "Analizando PDF...",
+        points_type: "Analizando PDF...",
+        rubric: "Analizando PDF...",
+        evaluation: "Realizando feedback...",
+        general_feedback: "Realizando feedback..."
+    };
 
-    let estadoIndex = 0;
-
-    function updateEstado() {
-        if (estadoIndex < estados.length) {
-            estadoElement.textContent = estados[estadoIndex];
-            estadoIndex++;
-            if (estadoIndex < estados.length) {
-                setTimeout(updateEstado, 7000); // Actualiza cada 7 segundos
-            }
+    function updateEstado(job) {
+        let texto = estados[job.stage] || estados[job.status] || "Cargando archivo...";
+        if (job.slides_total > 0) {
+            texto += ` (diapositiva ${job.slides_done} de ${job.slides_total})`;
         }
+        estadoElement.textContent = texto;
+    }
+
+    function pollJob(statusUrl, resultUrl) {
+        fetch(statusUrl)
+            .then(response => {
+                if (!response.ok) {
+                    // El trabajo no existe (p. ej. expiró) o el servidor falló: se muestra el error y se deja de consultar
+                    return response.json()
+                        .catch(() => ({}))
+                        .then(body => {
+                            estadoElement.textContent = body.error || "No se pudo consultar el estado del análisis.";
+                        });
+                }
+                return response.json().then(job => {
+                    if (job.status === 'done' || job.status === 'failed') {
+                        window.location = resultUrl; // Muestra el resultado o el mensaje de error
+                        return;
+                    }
+                    updateEstado(job);
+                    setTimeout(() => pollJob(statusUrl, resultUrl), 1000);
+                });
+            })
+            .catch(() => setTimeout(() => pollJob(statusUrl, resultUrl), 3000)); // Error de red: se reintenta
+    }
+
+    function submitJob() {
+        estadoElement.textContent = "Cargando archivo...";
+        fetch(form.dataset.jobsUrl, { method: 'POST', body: new FormData(form) })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Envío rechazado');
+                }
+                return response.json();
+            })
+            .then(job => {
+                if (form.elements.live_feedback.checked) {
+                    window.location = job.stream_url; // Modo en vivo: feedback por diapositiva vía server-sent events
+                } else {
+                    pollJob(job.status_url, job.result_url);
+                }
+            })
+            .catch(() => form.submit()); // El envío normal muestra el mensaje de error del formulario
     }
 
     submitButton.addEventListener('click', function (event) {
@@ -33,10 +81,7 @@ document.addEventListener('DOMContentLoaded', function () {
         resultsSection.classList.remove('hidden');
         setTimeout(() => {
             resultsSection.classList.add('show');
-            form.submit(); // Envía el formulario después de la animación
+            submitJob(); // Envía el formulario como trabajo después de la animación
         }, 500); // 500ms coincide con la duración de la animación
-        
-        // Iniciar la actualización del estado
-        updateEstado();
     });
 });
@@ -0,0 +1,67 @@
+// stream.js
+
+document.addEventListener('DOMContentLoaded', function () {
+    const container = document.getElementById('Stream');
+    const puntajeElement = document.getElementById('Puntaje');
+    const moderacionElement = document.getElementById('Moderacion');
+    const generalElement = document.getElementById('FeedbackGeneral');
+    const diapositivasElement = document.getElementById('Diapositivas');
+    const verResultado = document.getElementById('VerResultado');
+
+    function fillList(list, items) {
+        list.innerHTML = '';
+        items.forEach(item => {
+            const li = document.createElement('li');
+            li.textContent = item;
+            list.appendChild(li);
+        });
+    }
+
+    // Las diapositivas pueden llegar en cualquier orden; se insertan ordenadas por número
+    function addSlide(slide) {
+        const card = document.createElement('div');
+        card.className = 'card mb-2';
+        card.dataset.slide = slide.slide;
+        const header = document.createElement('div');
+        header.className = 'card-header';
+        const title = document.createElement('h3');
+        title.textContent = `Diapositiva ${slide.slide}`;
+        header.appendChild(title);
+        const body = document.createElement('div');
+        body.className = 'card-body';
+        const list = document.createElement('ul');
+        fillList(list, slide.feedback);
+        body.appendChild(list);
+        card.appendChild(header);
+        card.appendChild(body);
+
+        const next = Array.from(diapositivasElement.children).find(other => Number(other.dataset.slide) > slide.slide);
+        diapositivasElement.insertBefore(card, next || null);
+    }
+
+    const source = new EventSource(container.dataset.eventsUrl);
+
+    source.addEventListener('slide', event => addSlide(JSON.parse(event.data)));
+
+    source.addEventListener('moderation', event => {
+        const issues = JSON.parse(event.data);
+        fillList(moderacionElement, issues.length ? issues : ['No se detectó contenido inapropiado.']);
+    });
+
+    source.addEventListener('grade', event => {
+        const grade = JSON.parse(event.data);
+        puntajeElement.textContent = grade.presentation_score;
+        fillList(generalElement.querySelector('ul'), grade.general_feedback);
+        generalElement.classList.remove('d-none');
+    });
+
+    source.addEventListener('done', () => {
+        source.close();
+        verResultado.classList.remove('d-none');
+    });
+
+    source.addEventListener('failed', () => {
+        source.close();
+        window.location = container.dataset.resultUrl; // Muestra el mensaje de error en el formulario
+    });
+});
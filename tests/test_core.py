@@ -0,0 +1,192 @@
+"""
+Pruebas de la lógica pura del análisis (sin red ni credenciales; OpenAI es el falso de benchmarks/).
+
+Uso: python -m pytest -q tests
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+import app
+from content_filter import AMBIGUOUS, INAPPROPRIATE, WordlistFilter, load_lexicon
+from fake_openai import fake_openai
+from llm import LLMClient
+from llm_cache import LLMCache
+from pipeline import run_stages
+from prompts import count_tokens, fit_texts, pack_by_budget
+
+@pytest.fixture
+def flask_app(tmp_path, monkeypatch):
+    # Cachés, almacenes y subidas en una carpeta temporal; cada llamada llega al OpenAI falso
+    monkeypatch.chdir(tmp_path)
+    return app.create_app({'LLM_CACHE_ENABLED': False, 'SLIDE_STORE_ENABLED': False})
+
+# validate_scores
+
+def test_validate_scores_matches_measures_ignoring_case_and_spaces():
+    items = [{'measure': '  claridad ', 'score': 4, 'feedback': ' Bien '}, {'measure': 'ORDEN', 'score': '3', 'feedback': None}]
+    assert app.validate_scores(items, ['Claridad', 'Orden'], [4, 3, 2, 1]) == {'Claridad': (4, 'Bien'), 'Orden': (3, '')}
+
+def test_validate_scores_drops_invalid_entries():
+    items = [
+        {'measure': 'Claridad', 'score': 5},       # Fuera de los tipos de puntos
+        {'measure': 'Orden', 'score': True},       # Un booleano no es un puntaje
+        {'measure': 'Inventada', 'score': 4},      # No está en la rúbrica
+        {'measure': 'Ritmo', 'score': 'cuatro'},
+        'no es un objeto',
+    ]
+    assert app.validate_scores(items, ['Claridad', 'Orden', 'Ritmo'], [4, 3, 2, 1]) == {}
+    assert app.validate_scores({'scores': []}, ['Claridad'], [4]) == {}
+
+# WordlistFilter
+
+@pytest.fixture(scope='module')
+def word_filter():
+    return WordlistFilter(load_lexicon([os.path.join(app.LEXICON_DIR, 'es.txt'), os.path.join(app.LEXICON_DIR, 'en.txt')]))
+
+def test_wordlist_filter_only_matches_whole_words(word_filter):
+    assert word_filter.find("La computadora del diputado") == {}
+    assert word_filter.find("Shitake con salsa") == {}
+    assert word_filter.find("Qué PUTA suerte") == {'puta': INAPPROPRIATE}
+
+def test_wordlist_filter_ignores_accents_and_accepts_endings(word_filter):
+    assert word_filter.find("una pendejada") == {'pendej': INAPPROPRIATE}
+    assert word_filter.find("Cabron") == {'cabrón': INAPPROPRIATE}
+    assert word_filter.find("the fucking end") == {'fuck': INAPPROPRIATE}
+
+def test_wordlist_filter_reports_overlapping_and_ambiguous_terms(word_filter):
+    found = word_filter.find("hijo de puta, clase de sexo")
+    assert found == {'hijo de puta': INAPPROPRIATE, 'puta': INAPPROPRIATE, 'sexo': AMBIGUOUS}
+
+def test_wordlist_filter_with_custom_lexicon(tmp_path):
+    lexicon = tmp_path / 'lexicon.txt'
+    lexicon.write_text("# comentario\nhe\nshe\n?hers\n", encoding='utf-8')
+    word_filter = WordlistFilter(load_lexicon([str(lexicon)]))
+    assert word_filter.find("ushers she hers") == {'she': INAPPROPRIATE, 'hers': AMBIGUOUS}
+
+# pack_by_budget y fit_texts
+
+def test_pack_by_budget_respects_item_count_and_budget():
+    items = list('abcdefg')
+    batches = pack_by_budget(items, [3, 3, 3, 10, 1, 1, 1], max_items=2, budget=7)
+    assert batches == [['a', 'b'], ['c'], ['d'], ['e', 'f'], ['g']]
+    assert [item for batch in batches for item in batch] == items
+
+def test_fit_texts_keeps_short_texts_and_trims_long_ones():
+    short = "hola mundo"
+    long = " ".join(f"palabra{idx}" for idx in range(400))
+    assert fit_texts([short, long], 10_000) == [short, long]
+
+    fitted = fit_texts([short, long, long], 200)
+    assert fitted[0] == short
+    assert sum(count_tokens(text) for text in fitted) <= 200
+    assert fitted[1] == fitted[2] and len(fitted[1]) < len(long)
+
+# run_stages
+
+def test_run_stages_passes_dependency_results_in_order():
+    stages = {
+        'a': (lambda: 2, []),
+        'b': (lambda: 3, []),
+        'c': (lambda a, b: a * 10 + b, ['a', 'b']),
+    }
+    results, timings = run_stages(stages)
+    assert results == {'a': 2, 'b': 3, 'c': 23}
+    assert timings['c'][0] >= max(timings['a'][1], timings['b'][1])
+
+def test_run_stages_rejects_cycles_and_unknown_dependencies():
+    with pytest.raises(ValueError, match='cíclicas'):
+        run_stages({'a': (lambda b: b, ['b']), 'b': (lambda a: a, ['a'])})
+    with pytest.raises(ValueError, match='no existe'):
+        run_stages({'a': (lambda x: x, ['x'])})
+
+def test_run_stages_propagates_errors_and_skips_dependents():
+    ran = []
+    stages = {
+        'falla': (lambda: 1 / 0, []),
+        'despues': (lambda value: ran.append(value), ['falla']),
+    }
+    with pytest.raises(ZeroDivisionError):
+        run_stages(stages)
+    assert ran == []
+
+# LLMCache
+
+RESPONSE = {'choices': [{'message': {'content': 'hola'}}]}
+
+def test_llm_cache_memory_lru_evicts_least_recently_used():
+    cache = LLMCache(None, max_memory_entries=2)
+    cache.set('a', RESPONSE)
+    cache.set('b', RESPONSE)
+    assert cache.get('a') == RESPONSE  # 'a' pasa a ser la más reciente
+    cache.set('c', RESPONSE)
+    assert cache.get('b') is None
+    assert cache.get('a') == RESPONSE and cache.get('c') == RESPONSE
+
+def test_llm_cache_expires_entries_after_ttl(tmp_path):
+    cache = LLMCache(str(tmp_path / 'cache.sqlite3'), ttl=0.05)
+    cache.set('a', RESPONSE)
+    assert cache.get('a') == RESPONSE
+    time.sleep(0.1)
+    assert cache.get('a') is None
+
+def test_llm_cache_disk_keeps_most_recently_used_entries(tmp_path):
+    cache = LLMCache(str(tmp_path / 'cache.sqlite3'), max_memory_entries=0, max_disk_entries=2)
+    cache.set('a', RESPONSE)
+    time.sleep(0.01)
+    cache.set('b', RESPONSE)
+    time.sleep(0.01)
+    assert cache.get('a') == RESPONSE  # Renueva el último uso de 'a'
+    time.sleep(0.01)
+    cache.set('c', RESPONSE)
+    assert cache.get('b') is None
+    assert cache.get('a') == RESPONSE and cache.get('c') == RESPONSE
+
+def test_llm_client_does_not_cache_rejected_replies():
+    replies = iter(["sin formato", "4, 3, 2, 1"])
+    client = LLMClient(cache=LLMCache(None))
+    messages = [{'role': 'user', 'content': 'puntos'}]
+    validate = lambda response: app.parse_points_type(response['choices'][0]['message']['content'])
+    with fake_openai(latency=0, responder=lambda _: next(replies)) as fake:
+        assert client.chat_completion('gpt-4', messages, validate=validate)['choices'][0]['message']['content'] == "sin formato"
+        assert client.chat_completion('gpt-4', messages, validate=validate)['choices'][0]['message']['content'] == "4, 3, 2, 1"
+        assert client.chat_completion('gpt-4', messages, validate=validate)['choices'][0]['message']['content'] == "4, 3, 2, 1"
+    assert fake.calls == 2
+
+# Con el OpenAI falso
+
+def test_evaluation_retries_only_pending_measures(flask_app):
+    prompts = []
+    lock = threading.Lock()
+
+    def respond(messages):
+        prompt = messages[-1]['content']
+        if 'objeto JSON de la forma' not in prompt:
+            return "La diapositiva es coherente con el tema."
+        with lock:
+            prompts.append(prompt)
+            first = len(prompts) == 1
+        # La primera respuesta solo puntúa una medida; el reintento debe pedir solo la otra
+        scores = [{'measure': 'Claridad', 'score': 4, 'feedback': 'Clara'}] if first else [{'measure': 'Orden', 'score': 3, 'feedback': 'Ordenada'}]
+        return json.dumps({'scores': scores})
+
+    with fake_openai(latency=0, responder=respond):
+        grade, feedback, _, used_measures = app.evaluate_presentation(
+            ['Claridad', 'Orden'], [4, 3, 2, 1], ['Título'], ['Subtítulo'], ['Cuerpo'], [(1, 'logo')], 'Enseñanza Media', 'Tema')
+    assert used_measures == {'Claridad': 4, 'Orden': 3}
+    assert len(prompts) == 2 and 'Claridad' not in prompts[1].split('Medidas:')[1].split('Tipos de puntos:')[0]
+
+def test_clean_deck_skips_moderation_call(flask_app):
+    with fake_openai(latency=0, responder=lambda _: "Contiene palabras inappropriate.") as fake:
+        assert app.check_for_inappropriate_content(["Diapositiva 1\nEl ciclo del agua", "La computadora"]) == []
+        assert fake.calls == 0
+        issues = app.check_for_inappropriate_content(["Diapositiva limpia", "Esto es una mierda"])
+    assert fake.calls == 1 and issues == ["Contiene palabras inappropriate."]
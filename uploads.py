@@ -0,0 +1,131 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from flask import Request, current_app
+from werkzeug.utils import secure_filename
+
+# Bloque de copia al pasar una subida a disco
+COPY_CHUNK_SIZE = 1024 * 1024
+
+class Upload:
+    """
+    Archivo subido, leído una sola vez. Los archivos pequeños quedan en memoria; los grandes en un
+    archivo temporal con nombre único que se elimina con close().
+    Todos los extractores reciben el mismo source: los bytes en memoria o la ruta del temporal.
+    sha256 es el hash del contenido, calculado mientras se recibía.
+    """
+
+    def __init__(self, filename, data=None, path=None, sha256=None):
+        self.filename = filename
+        self.data = data
+        self.path = path
+        self.sha256 = sha256
+
+    @property
+    def source(self):
+        return self.path if self.path else self.data
+
+    def read(self):
+        if self.path is None:
+            return self.data
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def close(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+        self.data = None
+
+class SpooledUpload:
+    """
+    Destino de un archivo del formulario mientras Werkzeug lo recibe: en memoria hasta max_memory
+    bytes y, si los supera, en un temporal con nombre único en 'directory' (los extractores y el
+    pool de procesos necesitan una ruta, que SpooledTemporaryFile no da). Calcula el SHA-256 al
+    recibir. Werkzeug lo cierra al terminar la petición; el temporal solo se elimina ahí si nadie
+    lo tomó con to_upload().
+    """
+
+    def __init__(self, max_memory, directory=None, suffix=''):
+        self._file = io.BytesIO()
+        self.max_memory = max_memory
+        self.directory = directory
+        self.suffix = suffix
+        self.path = None
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._claimed = False
+
+    def __getattr__(self, name):
+        # read, readline, seek, tell, etc. van al archivo actual (memoria o disco)
+        if name == '_file':
+            raise AttributeError(name)
+        return getattr(self._file, name)
+
+    def write(self, data):
+        self._sha256.update(data)
+        self.size += len(data)
+        if self.path is None and self.size > self.max_memory:
+            self._rollover()
+        return self._file.write(data)
+
+    def _rollover(self):
+        fd, self.path = tempfile.mkstemp(suffix=self.suffix, prefix='upload_', dir=self.directory)
+        memory = self._file
+        self._file = os.fdopen(fd, 'w+b')
+        self._file.write(memory.getbuffer())
+        memory.close()
+
+    @property
+    def sha256(self):
+        return self._sha256.hexdigest()
+
+    def to_upload(self, filename):
+        """Entrega el contenido como Upload, que desde ahora es dueño del temporal."""
+        self._claimed = True
+        if self.path is None:
+            return Upload(filename, data=self._file.getvalue(), sha256=self.sha256)
+        self._file.close()
+        return Upload(filename, path=self.path, sha256=self.sha256)
+
+    def close(self):
+        self._file.close()
+        if self.path and not self._claimed and os.path.exists(self.path):
+            os.remove(self.path)
+
+def upload_suffix(filename):
+    return os.path.splitext(secure_filename(filename or ''))[1].lower()
+
+class UploadRequest(Request):
+    """
+    Petición de Flask cuyos archivos se reciben directamente en un SpooledUpload, con el límite de
+    memoria y la carpeta de la configuración (UPLOAD_MEMORY_BYTES, UPLOAD_FOLDER), en lugar del
+    temporal que Werkzeug crea para todo archivo de más de 500 KB.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return SpooledUpload(current_app.config['UPLOAD_MEMORY_BYTES'], current_app.config['UPLOAD_FOLDER'], upload_suffix(filename))
+
+def spool_upload(file, max_memory, directory=None):
+    """
+    Toma un archivo subido (FileStorage de Werkzeug) sin volver a copiarlo si ya llegó en un
+    SpooledUpload; si no, lo copia una sola vez con las mismas reglas.
+    Args:
+        file (FileStorage): Archivo del formulario.
+        max_memory (int): Bytes hasta los que el archivo se conserva en memoria.
+        directory (str): Carpeta de los archivos temporales; None usa la del sistema.
+    Returns:
+        Upload: El archivo en memoria o en un temporal único.
+    """
+    if isinstance(file.stream, SpooledUpload):
+        return file.stream.to_upload(file.filename)
+
+    spooled = SpooledUpload(max_memory, directory, upload_suffix(file.filename))
+    try:
+        shutil.copyfileobj(file.stream, spooled, COPY_CHUNK_SIZE)
+    except Exception:
+        spooled.close()
+        raise
+    return spooled.to_upload(file.filename)
@@ -0,0 +1,136 @@
+import hashlib
+import io
+import logging
+import threading
+import time
+from concurrency import imap_bounded, run_in_pool
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Máximo de imágenes por llamada síncrona a batch_annotate_images que acepta la API
+VISION_MAX_BATCH_SIZE = 16
+# Formatos que Vision acepta directamente; estas imágenes se envían sin recodificar si ya son pequeñas
+VISION_NATIVE_FORMATS = {'JPEG', 'PNG', 'GIF', 'BMP', 'WEBP'}
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Devuelve un único ImageAnnotatorClient compartido por todo el proceso."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from google.cloud import vision  # Se importa en el primer uso: alarga bastante el arranque
+                _client = vision.ImageAnnotatorClient()
+    return _client
+
+def configure_client(client):
+    """Reemplaza el cliente compartido (por ejemplo, con un cliente falso); None lo reinicia."""
+    global _client
+    with _client_lock:
+        _client = client
+
+def prepare_image(blob, max_side=1024):
+    """
+    Reduce la imagen para que su lado mayor no supere max_side y la codifica para enviarla a Vision.
+    Args:
+        blob (bytes): Bytes originales de la imagen.
+        max_side (int): Lado máximo en píxeles.
+    Returns:
+        bytes: Los bytes originales si la imagen ya es pequeña y de un formato aceptado; si no,
+        la imagen reducida en JPEG, o en PNG si tiene transparencia.
+    """
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(blob))  # Solo lee la cabecera; los píxeles se decodifican si hace falta
+    if max(image.size) <= max_side and image.format in VISION_NATIVE_FORMATS:
+        return blob
+    image.thumbnail((max_side, max_side))
+    output = io.BytesIO()
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image.save(output, format='PNG')
+    else:
+        image.convert('RGB').save(output, format='JPEG', quality=85)
+    return output.getvalue()
+
+def prepare_images(blobs, max_side=1024):
+    """prepare_image para un lote; se envía completo a un proceso del pool para pagar un solo viaje."""
+    return [prepare_image(blob, max_side) for blob in blobs]
+
+def annotate_images(images, batch_size=VISION_MAX_BATCH_SIZE, max_side=1024, max_in_flight=2, store=None, executor=None):
+    """
+    Obtiene las etiquetas de Vision de cada imagen, anotando una sola vez cada imagen distinta.
+    Las imágenes se consumen a medida que se arma cada lote, de modo que solo los lotes en curso
+    quedan en memoria.
+    Args:
+        images (iterable): Pares (número de diapositiva, bytes de la imagen); puede ser un generador.
+        batch_size (int): Imágenes por llamada a batch_annotate_images.
+        max_side (int): Lado máximo de las imágenes enviadas.
+        max_in_flight (int): Lotes enviados simultáneamente.
+        store (SlideStore): Opcional; etiquetas ya obtenidas, por huella de la imagen. Las imágenes
+            conocidas no se envían a Vision y las nuevas se guardan.
+        executor (ProcessPoolExecutor): Opcional; pool de procesos donde se reducen las imágenes.
+    Returns:
+        list: Pares (número de diapositiva, etiquetas separadas por coma), en el orden de entrada.
+    """
+    from google.cloud import vision
+
+    batch_size = min(batch_size, VISION_MAX_BATCH_SIZE)
+    client = get_client()
+    slide_hashes = []
+    seen = set()
+    labels = {}
+
+    def unique_batches():
+        batch = []
+        for slide_idx, blob in images:
+            digest = hashlib.sha256(blob).hexdigest()
+            slide_hashes.append((slide_idx, digest))
+            if digest in seen:
+                continue
+            seen.add(digest)
+            known = store.get('vision', digest) if store is not None else None
+            if known is not None:
+                labels[digest] = known
+                continue
+            batch.append((digest, blob))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def annotate_batch(batch):
+        contents = run_in_pool(executor, prepare_images, [blob for _, blob in batch], max_side)
+        requests = [
+            vision.AnnotateImageRequest(
+                image=vision.Image(content=content),
+                features=[vision.Feature(type_=vision.Feature.Type.LABEL_DETECTION)]
+            )
+            for content in contents
+        ]
+        start = time.perf_counter()
+        response = client.batch_annotate_images(requests=requests)
+        metrics.observe('vision_request_duration_seconds', time.perf_counter() - start)
+        metrics.inc('vision_requests_total')
+        metrics.inc('vision_images_total', len(requests))
+        batch_labels = {}
+        for (digest, _), image_response in zip(batch, response.responses):
+            if image_response.error.message:
+                logger.warning("Error de Vision al analizar una imagen: %s", image_response.error.message)
+                batch_labels[digest] = ''
+                continue
+            batch_labels[digest] = ', '.join(label.description for label in image_response.label_annotations)
+            if store is not None:
+                store.put('vision', digest, batch_labels[digest])
+        return batch_labels
+
+    calls = 0
+    for batch_labels in imap_bounded(annotate_batch, unique_batches(), max_in_flight):
+        labels.update(batch_labels)
+        calls += 1
+
+    logger.debug("Vision: %d imágenes, %d distintas, %d llamadas", len(slide_hashes), len(seen), calls)
+    return [(slide_idx, labels.get(digest, '')) for slide_idx, digest in slide_hashes]
@@ -0,0 +1,12 @@
+"""
+Punto de entrada WSGI para producción:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Cada proceso del servidor crea sus propios servicios con create_app(); el estado compartido
+(caché de OpenAI, rúbricas, resultados por diapositiva, trabajos y métricas) vive en SQLite y
+archivos bajo cache/, al alcance de todos los procesos.
+"""
+from app import create_app
+
+app = create_app()